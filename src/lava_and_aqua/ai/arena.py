@@ -0,0 +1,98 @@
+from array import array
+
+from utils.types import Direction
+
+
+DIRECTIONS = tuple(Direction)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+NO_PARENT = -1
+
+# Free slot of the arena's index.
+EMPTY = -1
+INITIAL_SLOTS = 1024
+
+
+class StateArena:
+    """Append-only, deduplicated store of encoded states for the compact
+    search mode.
+
+    Encodings are concatenated into one ``bytearray`` with their end offsets
+    in an ``array``; the parent index and the direction taken from it live in
+    two more parallel arrays. Each encoding is stored only there: ``slots``
+    is an open-addressed table of entry indexes, probed linearly from the
+    key's hash and compared against ``key(i)``, kept at most half full.
+    Entry ``i`` costs its encoding plus 13 bytes, and 8 to 16 bytes of slots.
+    """
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.ends = array("Q")
+        self.parents = array("i")
+        self.actions = array("b")
+        self.slots = array("i", [EMPTY]) * INITIAL_SLOTS
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def _probe(self, key: bytes) -> int:
+        """Slot holding ``key``, or the free slot where it belongs."""
+        slots = self.slots
+        mask = len(slots) - 1
+        slot = hash(key) & mask
+        while (index := slots[slot]) != EMPTY and self.key(index) != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def add(self, key: bytes, parent: int = NO_PARENT, direction: Direction | None = None) -> int | None:
+        """Store ``key`` and return its entry index; None if it is stored already."""
+        slot = self._probe(key)
+        if self.slots[slot] != EMPTY:
+            return None
+        index = len(self.ends)
+        self.slots[slot] = index
+        self.data += key
+        self.ends.append(len(self.data))
+        self.parents.append(parent)
+        self.actions.append(-1 if direction is None else DIRECTION_CODES[direction])
+        if 2 * len(self.ends) > len(self.slots):
+            self.reindex(2 * len(self.slots))
+        return index
+
+    def reindex(self, size: int = INITIAL_SLOTS) -> None:
+        """Rebuild the index with ``size`` slots, or more while that would be
+        over half full; after the entries were replaced, as by a checkpoint."""
+        while 2 * len(self.ends) > size:
+            size *= 2
+        slots = self.slots = array("i", [EMPTY]) * size
+        mask = size - 1
+        for index in range(len(self.ends)):
+            slot = hash(self.key(index)) & mask
+            while slots[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            slots[slot] = index
+
+    def key(self, index: int) -> bytes:
+        start = self.ends[index - 1] if index else 0
+        return bytes(self.data[start : self.ends[index]])
+
+    def path(self, index: int) -> list[int]:
+        """Indexes from the root down to ``index``."""
+        indexes = []
+        while index != NO_PARENT:
+            indexes.append(index)
+            index = self.parents[index]
+        indexes.reverse()
+        return indexes
+
+    def direction(self, index: int) -> Direction | None:
+        code = self.actions[index]
+        return None if code < 0 else DIRECTIONS[code]
+
+    def nbytes(self) -> int:
+        return (
+            len(self.data)
+            + self.ends.itemsize * len(self.ends)
+            + self.parents.itemsize * len(self.parents)
+            + self.actions.itemsize * len(self.actions)
+            + self.slots.itemsize * len(self.slots)
+        )
@@ -0,0 +1,244 @@
+import json
+import os
+import struct
+from array import array
+from collections import deque
+from pathlib import Path
+
+import xxhash
+
+from ai.arena import DIRECTION_CODES, DIRECTIONS, StateArena
+from ai.node import Node
+from ai.priority_queue import BucketQueue
+from core.codec import StateCodec
+from core.state import MOVE_ACTIONS
+
+
+MAGIC = b"LAQCKPT"
+VERSION = 1
+
+# Search modes whose frontier can be written to and read from a checkpoint.
+CHECKPOINT_MODES = ("dfs", "bfs", "bfs_compact", "ucs", "a_star")
+
+# After each fixed-width state key of the node table: parent index, direction
+# code and path cost. The root has no parent and no direction.
+NODE_RECORD = struct.Struct("<IBI")
+NO_PARENT_INDEX = 0xFFFFFFFF
+NO_DIRECTION = 0xFF
+
+# Queue entry of ucs and a_star: node index, priority, tie and cost; the
+# entry's state key follows.
+QUEUE_ENTRY = struct.Struct("<IqqI")
+
+COUNT = struct.Struct("<Q")
+DIS_VALUE = struct.Struct("<q")
+
+STATS_COUNTERS = (
+    "generated",
+    "expanded",
+    "duplicates",
+    "pruned",
+    "max_frontier",
+    "max_visited",
+    "elapsed",
+    "seconds",
+)
+
+
+def level_fingerprint(codec: StateCodec, start_state) -> str:
+    return xxhash.xxh3_64_hexdigest(codec.encode(start_state))
+
+
+def _key_bytes(key, key_mode: str) -> bytes:
+    if key_mode == "exact":
+        return struct.pack("<H", len(key)) + key
+    if key_mode == "digest":
+        return key.to_bytes(16, "little")
+    return key.to_bytes(8, "little", signed=True)
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        chunk = self.data[self.offset : self.offset + size]
+        self.offset += size
+        return bytes(chunk)
+
+    def unpack(self, record: struct.Struct) -> tuple:
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+    def key(self, key_mode: str):
+        if key_mode == "exact":
+            (length,) = struct.unpack_from("<H", self.data, self.offset)
+            self.offset += 2
+            return self.take(length)
+        if key_mode == "digest":
+            return int.from_bytes(self.take(16), "little")
+        return int.from_bytes(self.take(8), "little", signed=True)
+
+
+def _node_table(nodes, codec: StateCodec) -> tuple[bytearray, dict[int, int]]:
+    """Every node in ``nodes`` and its ancestors, parents before children,
+    as packed records; and the record index of each node by ``id``."""
+    index: dict[int, int] = {}
+    order: list[Node] = []
+    for node in nodes:
+        chain = []
+        while node is not None and id(node) not in index:
+            chain.append(node)
+            node = node.parent
+        for ancestor in reversed(chain):
+            index[id(ancestor)] = len(order)
+            order.append(ancestor)
+
+    table = bytearray(COUNT.pack(len(order)))
+    for node in order:
+        parent = NO_PARENT_INDEX if node.parent is None else index[id(node.parent)]
+        direction = NO_DIRECTION if node.action is None else DIRECTION_CODES[node.action.direction]
+        table += codec.encode_fixed(node.state)
+        table += NODE_RECORD.pack(parent, direction, node.path_cost)
+    return table, index
+
+
+def _read_node_table(reader: _Reader, codec: StateCodec, start_node: Node) -> list[Node]:
+    nodes: list[Node] = []
+    for _ in range(reader.count()):
+        key = reader.take(codec.key_width)
+        parent, direction, path_cost = reader.unpack(NODE_RECORD)
+        if parent == NO_PARENT_INDEX:
+            # The root: keep the caller's start node so paths begin there.
+            nodes.append(start_node)
+            continue
+        state = codec.decode(key, path_cost)
+        action = MOVE_ACTIONS[DIRECTIONS[direction]]
+        nodes.append(Node(state, nodes[parent], action, path_cost))
+    return nodes
+
+
+def write_checkpoint(path: Path | str, search, mode: str, start_node: Node, arguments: dict) -> None:
+    """Write ``search``'s frontier, visited and dis tables and counters.
+
+    States are stored as fixed-width ``StateCodec`` keys: the node table
+    holds the frontier's nodes with their ancestors, so solution paths can
+    still be rebuilt after a resume. The file is replaced atomically.
+    """
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Search mode {mode} cannot be checkpointed")
+    codec = StateCodec(start_node.state)
+    key_mode = search.key_mode
+    header = {
+        "version": VERSION,
+        "mode": mode,
+        "key_mode": key_mode,
+        "arguments": arguments,
+        "level": level_fingerprint(codec, start_node.state),
+        "num_of_created_nodes": search.num_of_created_nodes,
+        "num_of_stale_pops": search.num_of_stale_pops,
+        "num_of_dominated_states": search.num_of_dominated_states,
+    }
+    if search.stats is not None:
+        stats = search.stats.to_dict()
+        header["stats"] = {name: stats[name] for name in STATS_COUNTERS}
+
+    body = bytearray()
+    if mode == "bfs_compact":
+        arena = search.arena
+        header["head"] = search.arena_head
+        for part in (bytes(arena.data), arena.ends.tobytes(), arena.parents.tobytes(), arena.actions.tobytes()):
+            body += COUNT.pack(len(part)) + part
+    elif mode in ("ucs", "a_star"):
+        entries = list(search.frontier.entries())
+        table, index = _node_table((node for _, _, (_, _, node) in entries), codec)
+        body += table + COUNT.pack(len(entries))
+        for priority, tie, (cost, key, node) in entries:
+            body += QUEUE_ENTRY.pack(index[id(node)], priority, tie, cost) + _key_bytes(key, key_mode)
+    else:
+        frontier = list(search.frontier)
+        table, index = _node_table(frontier, codec)
+        body += table + COUNT.pack(len(frontier))
+        for node in frontier:
+            body += struct.pack("<I", index[id(node)])
+
+    body += COUNT.pack(len(search.visited))
+    for key in search.visited:
+        body += _key_bytes(key, key_mode)
+    body += COUNT.pack(len(search.dis))
+    for key, value in search.dis.items():
+        body += _key_bytes(key, key_mode) + DIS_VALUE.pack(value)
+
+    encoded_header = json.dumps(header).encode()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(MAGIC + bytes((VERSION,)))
+        file.write(struct.pack("<I", len(encoded_header)) + encoded_header)
+        file.write(body)
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path: Path | str, search, start_node: Node) -> tuple[str, dict, object]:
+    """Restore ``search``'s tables and counters from ``path``.
+
+    Returns the search mode, the arguments it was run with and its
+    frontier: a deque (bfs), a stack (dfs), a ``BucketQueue`` (ucs, a_star)
+    or an ``(arena, head)`` pair (bfs_compact).
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC) or data[len(MAGIC)] != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} search checkpoint")
+    reader = _Reader(data)
+    reader.offset = len(MAGIC) + 1
+    (header_length,) = reader.unpack(struct.Struct("<I"))
+    header = json.loads(reader.take(header_length))
+
+    codec = StateCodec(start_node.state)
+    if header["level"] != level_fingerprint(codec, start_node.state):
+        raise ValueError(f"{path} was written for another level")
+    key_mode = header["key_mode"]
+    if key_mode != search.key_mode:
+        raise ValueError(f"{path} was written with {key_mode} state keys, not {search.key_mode}")
+
+    mode = header["mode"]
+    if mode == "bfs_compact":
+        arena = StateArena()
+        arena.data = bytearray(reader.take(reader.count()))
+        arena.ends = array("Q", reader.take(reader.count()))
+        arena.parents = array("i", reader.take(reader.count()))
+        arena.actions = array("b", reader.take(reader.count()))
+        arena.reindex()
+        frontier = (arena, header["head"])
+    elif mode in ("ucs", "a_star"):
+        nodes = _read_node_table(reader, codec, start_node)
+        frontier = BucketQueue()
+        for _ in range(reader.count()):
+            node_index, priority, tie, cost = reader.unpack(QUEUE_ENTRY)
+            frontier.add(priority, (cost, reader.key(key_mode), nodes[node_index]), tie=tie)
+    else:
+        nodes = _read_node_table(reader, codec, start_node)
+        order = [reader.unpack(struct.Struct("<I"))[0] for _ in range(reader.count())]
+        frontier = [nodes[index] for index in order]
+        if mode == "bfs":
+            frontier = deque(frontier)
+
+    search.visited = {reader.key(key_mode) for _ in range(reader.count())}
+    search.dis = {}
+    for _ in range(reader.count()):
+        key = reader.key(key_mode)
+        search.dis[key] = reader.unpack(DIS_VALUE)[0]
+
+    search.num_of_created_nodes = header["num_of_created_nodes"]
+    search.num_of_stale_pops = header["num_of_stale_pops"]
+    search.num_of_dominated_states = header["num_of_dominated_states"]
+    if search.stats is not None and "stats" in header:
+        for name, value in header["stats"].items():
+            setattr(search.stats, name, value)
+    return mode, header["arguments"], frontier
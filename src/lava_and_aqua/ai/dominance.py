@@ -0,0 +1,78 @@
+from core.state import GameState
+from utils.types import EntityType
+
+
+# Layers that can differ between two states of the same level, orbs excluded.
+PROJECTION_LAYERS = (
+    EntityType.WALL,
+    EntityType.LAVA,
+    EntityType.WATER,
+    EntityType.METAL_BOX,
+    EntityType.TIMED_DOOR,
+)
+
+
+def projection(state: GameState) -> tuple[int, ...]:
+    """The state without its orbs and door timers: player cell and layer masks."""
+    board = state.board
+    player = state.get_player()
+    masks = board.layer_masks()
+    return (
+        player.position.y * board.width + player.position.x,
+        *(masks.get(entity_type, 0) for entity_type in PROJECTION_LAYERS),
+    )
+
+
+def door_timers(state: GameState) -> tuple[int, ...]:
+    doors = sorted(
+        state.board.get_entities_by_type(EntityType.TIMED_DOOR),
+        key=lambda door: (door.position.y, door.position.x),
+    )
+    return tuple(door.remaining_time for door in doors)
+
+
+def collected_mask(state: GameState) -> int:
+    mask = 0
+    for orb_id in state.get_player().collected_orbs:
+        mask |= 1 << orb_id
+    return mask
+
+
+class DominanceIndex:
+    """Closed states grouped by ``projection``, for pruning dominated ones.
+
+    A state is dominated by a closed state with the same projection, the same
+    door timers, a superset of its collected orbs and no higher cost: orbs do
+    not block the player or the fluids, so the closed state can replay any
+    continuation of the dominated one at no extra cost. Once every door has
+    expired the timers are empty and only orbs and cost are compared. Live
+    timers must match because a door opening on another turn changes where
+    the fluids go.
+    """
+
+    def __init__(self) -> None:
+        # projection -> [(door timers, collected-orb mask, cost)], kept free of
+        # entries dominated by another entry.
+        self.entries: dict[tuple[int, ...], list[tuple[tuple[int, ...], int, int]]] = {}
+
+    def add(self, state: GameState, cost: int) -> bool:
+        """Record ``state`` as closed at ``cost``; False if it is dominated."""
+        key = projection(state)
+        timers = door_timers(state)
+        orbs = collected_mask(state)
+
+        entries = self.entries.setdefault(key, [])
+        for other_timers, other_orbs, other_cost in entries:
+            if other_timers == timers and orbs & ~other_orbs == 0 and other_cost <= cost:
+                return False
+
+        entries[:] = [
+            entry
+            for entry in entries
+            if not (entry[0] == timers and entry[1] & ~orbs == 0 and cost <= entry[2])
+        ]
+        entries.append((timers, orbs, cost))
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
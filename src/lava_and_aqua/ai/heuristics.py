@@ -0,0 +1,177 @@
+import mmap
+import os
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+
+import xxhash
+
+from core.board import Board
+from core.entitiy import Player, Position
+from core.state import GameState
+from utils.constants import PATTERN_DB_CACHE_DIR
+from utils.types import Direction, EntityType
+
+
+HEURISTICS = ("manhattan", "distance_field", "pattern_db")
+
+UNREACHABLE = -1
+
+# Obstacles that never leave the board and never let the player through.
+# Collision walls only appear later and timed doors expire, so ignoring them
+# can only make a distance shorter, which keeps the heuristic admissible.
+PERMANENT_OBSTACLES = (EntityType.WALL, EntityType.CRACKED_WALL)
+
+
+def permanent_obstacle_cells(board: Board) -> bytearray:
+    """One byte per ``y * width + x`` cell, set where a permanent obstacle stands."""
+    blocked = bytearray(board.width * board.height)
+    for entity_type in PERMANENT_OBSTACLES:
+        for entity in board.get_entities_by_type(entity_type):
+            blocked[entity.position.y * board.width + entity.position.x] = 1
+    return blocked
+
+
+class DistanceField:
+    """Player distance to the goal around the level's permanent obstacles.
+
+    Built once per level with a BFS from the goal and stored as a flat
+    ``array`` indexed by ``y * width + x``; cells the goal cannot be reached
+    from hold ``UNREACHABLE``.
+    """
+
+    def __init__(self, board: Board) -> None:
+        self.width = board.width
+        self.height = board.height
+        self.distances = array("i", [UNREACHABLE]) * (board.width * board.height)
+
+        blocked = permanent_obstacle_cells(board)
+
+        goal = board.goal_position()
+        if goal is None:
+            return
+
+        start = goal.y * board.width + goal.x
+        self.distances[start] = 0
+        frontier = deque([goal])
+        while frontier:
+            position = frontier.popleft()
+            distance = self.distances[position.y * self.width + position.x] + 1
+            for direction in Direction:
+                neighbour = position.move(direction.dx, direction.dy)
+                if not board.is_within_bounds(neighbour):
+                    continue
+                cell = neighbour.y * self.width + neighbour.x
+                if blocked[cell] or self.distances[cell] != UNREACHABLE:
+                    continue
+                self.distances[cell] = distance
+                frontier.append(neighbour)
+
+    def distance(self, position: Position) -> int:
+        return self.distances[position.y * self.width + position.x]
+
+
+class PatternDatabase:
+    """Moves needed to collect every remaining orb and then reach the goal.
+
+    States are abstracted to (player cell, collected-orb subset) on the static
+    grid of ``DistanceField`` and solved exactly by a backward BFS from
+    (goal, all orbs). The table holds one uint16 per abstract state, indexed
+    by ``subset * cells + cell``. It is written once to a cache file named
+    after the level's content hash and memory-mapped on every later load.
+    """
+
+    UNREACHABLE = 0xFFFF
+    VERSION = 1
+
+    def __init__(self, initial: GameState, cache_dir: Path | str = PATTERN_DB_CACHE_DIR) -> None:
+        board = initial.board
+        self.width = board.width
+        self.cells = board.width * board.height
+
+        orbs = sorted(
+            board.get_entities_by_type(EntityType.PORTAL_ORB),
+            key=lambda orb: orb.entity_id,
+        )
+        self.orb_bits = {orb.entity_id: 1 << index for index, orb in enumerate(orbs)}
+        self.orb_cells = {
+            orb.position.y * board.width + orb.position.x: 1 << index
+            for index, orb in enumerate(orbs)
+        }
+        self.entries = self.cells << len(orbs)
+
+        level_hash = xxhash.xxh3_128_hexdigest(
+            f"{self.VERSION}:{board.width}x{board.height}:".encode() + initial.state_key()
+        )
+        self.path = Path(cache_dir) / f"{level_hash}.pdb"
+        self.build_seconds = 0.0
+        self.loaded_from_cache = self.path.exists()
+
+        if not self.loaded_from_cache:
+            started = time.perf_counter()
+            table = self._build(board)
+            self.build_seconds = time.perf_counter() - started
+            self._write(table)
+
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.table = memoryview(self._mmap).cast("H")
+
+    def _build(self, board: Board) -> array:
+        table = array("H", [self.UNREACHABLE]) * self.entries
+        goal = board.goal_position()
+        if goal is None:
+            return table
+
+        blocked = permanent_obstacle_cells(board)
+        neighbours: list[list[int]] = []
+        for cell in range(self.cells):
+            position = Position(cell % self.width, cell // self.width)
+            cell_neighbours = []
+            for direction in Direction:
+                neighbour = position.move(direction.dx, direction.dy)
+                if board.is_within_bounds(neighbour):
+                    index = neighbour.y * self.width + neighbour.x
+                    if not blocked[index]:
+                        cell_neighbours.append(index)
+            neighbours.append(cell_neighbours)
+
+        all_orbs = (1 << len(self.orb_bits)) - 1
+        start = all_orbs * self.cells + goal.y * self.width + goal.x
+        table[start] = 0
+        frontier = deque([start])
+
+        # Walking backwards out of an orb cell un-collects its orb, so a
+        # predecessor may hold the subset with or without that orb.
+        while frontier:
+            index = frontier.popleft()
+            subset, cell = divmod(index, self.cells)
+            orb_bit = self.orb_cells.get(cell, 0)
+            if orb_bit and not subset & orb_bit:
+                continue  # stepping onto an orb always collects it
+
+            distance = table[index] + 1
+            previous_subsets = (subset, subset ^ orb_bit) if orb_bit else (subset,)
+            for neighbour in neighbours[cell]:
+                for previous in previous_subsets:
+                    previous_index = previous * self.cells + neighbour
+                    if table[previous_index] == self.UNREACHABLE:
+                        table[previous_index] = distance
+                        frontier.append(previous_index)
+
+        return table
+
+    def _write(self, table: array) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(partial, "wb") as file:
+            table.tofile(file)
+        os.replace(partial, self.path)
+
+    def distance(self, player: Player) -> int | None:
+        subset = 0
+        for orb_id in player.collected_orbs:
+            subset |= self.orb_bits[orb_id]
+        value = self.table[subset * self.cells + player.position.y * self.width + player.position.x]
+        return None if value == self.UNREACHABLE else value
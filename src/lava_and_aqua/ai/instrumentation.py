@@ -0,0 +1,271 @@
+import functools
+import json
+import time
+from typing import Callable
+
+from core.engine import GameEngine
+from utils.constants import DEFAULT_PROGRESS_INTERVAL
+
+
+# Cumulative timers. "expand" is the time spent generating children and so
+# includes the "spread" and "terminal_check" time of the moves it makes.
+PHASES = ("expand", "hash", "spread", "terminal_check")
+
+# GameEngine functions timed as a phase by the moves of an instrumented search.
+ENGINE_PHASES = {
+    "spread_lava_and_water": "spread",
+    "is_won": "terminal_check",
+    "is_lost": "terminal_check",
+}
+
+
+class BudgetExceeded(Exception):
+    """Raised from ``SearchStats.expansion`` when a budget runs out; the
+    search method then returns without a solution."""
+
+
+class SearchLimits:
+    """Time and node budget of one run: at most ``seconds`` of wall time and
+    ``nodes`` expansions, either None for no limit. A search resumed from a
+    checkpoint gets the full budget again."""
+
+    name = "limits"
+    check_interval = 1
+
+    def __init__(self, seconds: float | None = None, nodes: int | None = None) -> None:
+        self.seconds = seconds
+        self.nodes = nodes
+        self.exhausted = False
+
+    def check(self, stats, frontier: int) -> None:
+        if self.nodes is not None and stats.expanded - stats.run_expanded >= self.nodes:
+            self.exhausted = True
+            raise BudgetExceeded(f"node budget of {self.nodes} expansions used up")
+        if self.seconds is not None and stats.run_seconds() >= self.seconds:
+            self.exhausted = True
+            raise BudgetExceeded(f"time budget of {self.seconds:g} s used up")
+
+    def to_dict(self) -> dict:
+        return {"seconds": self.seconds, "nodes": self.nodes, "exhausted": self.exhausted}
+
+
+class SearchStats:
+    """Counters, phase timers and progress reports of one search.
+
+    Counters mean the same in every algorithm: ``generated`` children
+    produced, ``expanded`` states whose children were generated,
+    ``duplicates`` states or queue entries dropped as already seen,
+    ``pruned`` states dropped by dominance, lava deadlines or an unreachable
+    goal, and the largest frontier and visited table seen at an expansion.
+
+    ``progress(stats)`` is called every ``progress_interval`` expansions.
+    While a search runs, its own ``successors`` and ``state_key`` are
+    shadowed by timed versions, whose moves are made by a ``TimedEngine``;
+    no class is touched, so other searches are not timed. With ``timers``
+    off just the counters are kept, and a search without stats skips all of
+    it.
+
+    Budgets added with ``add_budget`` are checked every ``check_interval``
+    expansions of their own and stop the search by raising
+    ``BudgetExceeded``; the reason is kept in ``stopped``.
+    """
+
+    def __init__(
+        self,
+        timers: bool = True,
+        progress: Callable[["SearchStats"], None] | None = None,
+        progress_interval: int = DEFAULT_PROGRESS_INTERVAL,
+    ) -> None:
+        self.generated = 0
+        self.expanded = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self.max_frontier = 0
+        self.max_visited = 0
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.elapsed = 0.0
+        self.timers = timers
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self._next_progress = progress_interval
+        self._started: float | None = None
+        self.budgets: list = []
+        self.stopped: str | None = None
+        # Expansions and start time of the current run, which differ from
+        # the totals once a search is resumed from a checkpoint.
+        self.run_expanded = 0
+        # The search being run and its start node, while it runs.
+        self.search = None
+        self.root = None
+        # Expansion count at which each budget is checked next, and the
+        # lowest of them.
+        self._checks: list[int] = []
+        self._next_check = 0
+        self._depth = 0
+        self._lava_pruned = 0
+
+    def add_budget(self, budget) -> None:
+        """Check ``budget`` (``check(stats, frontier)``, ``check_interval``,
+        ``name`` and ``to_dict()``) while searches run."""
+        self.budgets.append(budget)
+        self._checks.append(self.expanded + budget.check_interval)
+        self._next_check = min(self._checks)
+
+    def _check_budgets(self, frontier: int) -> None:
+        for index, budget in enumerate(self.budgets):
+            if self.expanded >= self._checks[index]:
+                self._checks[index] = self.expanded + budget.check_interval
+                budget.check(self, frontier)
+        self._next_check = min(self._checks)
+
+    def expansion(self, generated: int, frontier: int, visited: int, expanded: int = 1) -> None:
+        """Count ``expanded`` states (one, or a whole layer of a search run
+        in worker processes) with ``generated`` children in all, given the
+        frontier and visited sizes after them."""
+        self.expanded += expanded
+        self.generated += generated
+        if frontier > self.max_frontier:
+            self.max_frontier = frontier
+        if visited > self.max_visited:
+            self.max_visited = visited
+        if self.progress is not None and self.expanded >= self._next_progress:
+            interval = self.progress_interval
+            self._next_progress = (self.expanded // interval + 1) * interval
+            self.progress(self)
+        if self.budgets and self.expanded >= self._next_check:
+            self._check_budgets(frontier)
+
+    def running_seconds(self) -> float:
+        """``elapsed`` including the search still running, for progress reports."""
+        if self._depth == 0:
+            return self.elapsed
+        return self.elapsed + time.perf_counter() - self._started
+
+    def run_seconds(self) -> float:
+        """Seconds since the current run started."""
+        if self._depth == 0:
+            return 0.0
+        return time.perf_counter() - self._started
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        seconds = self.seconds
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[phase] += time.perf_counter() - started
+
+        return wrapper
+
+    def timed_generator(self, phase: str, function: Callable) -> Callable:
+        """Like ``timed`` for a generator function: only the time spent
+        producing each item is counted, not the caller's work in between."""
+        seconds = self.seconds
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            items = function(*args, **kwargs)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    seconds[phase] += time.perf_counter() - started
+                    return
+                seconds[phase] += time.perf_counter() - started
+                yield item
+
+        return wrapper
+
+    @staticmethod
+    def _lava_pruned_count(search) -> int:
+        counter = getattr(search.problem, "num_of_pruned_states", None)
+        return 0 if counter is None else counter()
+
+    def start(self, search, root=None) -> None:
+        """Begin timing ``search`` from node ``root``; nested calls
+        (recursive searches) only count once."""
+        self._depth += 1
+        if self._depth > 1:
+            return
+        self.search = search
+        self.root = root
+        self.run_expanded = self.expanded
+        self._started = time.perf_counter()
+        self._lava_pruned = self._lava_pruned_count(search)
+        if not self.timers:
+            return
+
+        # Instance attributes shadowing the methods, dropped again in stop().
+        search.successors = self.timed_generator(
+            "expand", functools.partial(search.problem.successors, engine=TimedEngine(self))
+        )
+        search.state_key = self.timed("hash", type(search).state_key.__get__(search))
+
+    def stop(self, search) -> None:
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        self.elapsed += time.perf_counter() - self._started
+        self.pruned += self._lava_pruned_count(search) - self._lava_pruned
+        self.search = self.root = None
+        for name in ("successors", "state_key"):
+            search.__dict__.pop(name, None)
+
+    def to_dict(self) -> dict:
+        return {
+            "generated": self.generated,
+            "expanded": self.expanded,
+            "duplicates": self.duplicates,
+            "pruned": self.pruned,
+            "max_frontier": self.max_frontier,
+            "max_visited": self.max_visited,
+            "elapsed": self.elapsed,
+            "seconds": dict(self.seconds),
+            "stopped": self.stopped,
+            **{budget.name: budget.to_dict() for budget in self.budgets},
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+class TimedEngine:
+    """``GameEngine`` for the moves of one timed search: the functions in
+    ``ENGINE_PHASES`` add their time to ``stats``, the rest are the engine's."""
+
+    def __init__(self, stats: SearchStats) -> None:
+        for name, phase in ENGINE_PHASES.items():
+            setattr(self, name, stats.timed(phase, getattr(GameEngine, name)))
+
+    def __getattr__(self, name: str):
+        return getattr(GameEngine, name)
+
+
+def instrumented(method: Callable) -> Callable:
+    """Run a ``SearchAlgorithm`` search method under ``self.stats``, if set.
+
+    A budget running out ends the outermost call; the search's
+    ``budget_exceeded`` then decides whether another mode takes over.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self.stats
+        if stats is None:
+            return method(self, *args, **kwargs)
+        stats.start(self, args[0] if args else None)
+        try:
+            return method(self, *args, **kwargs)
+        except BudgetExceeded as exceeded:
+            if stats._depth > 1:
+                raise
+            stats.stopped = str(exceeded)
+        finally:
+            stats.stop(self)
+        return self.budget_exceeded(method.__name__, *args, **kwargs)
+
+    return wrapper
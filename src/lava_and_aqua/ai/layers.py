@@ -0,0 +1,122 @@
+import heapq
+import mmap
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Rough in-memory cost of one buffered bytes record beyond its payload: the
+# bytes object header and its slot in the list.
+RECORD_OVERHEAD = 41
+
+
+class LayerStore:
+    """BFS layers on disk, one sorted file of fixed-width records per depth.
+
+    Candidates for the next layer are buffered in memory up to
+    ``memory_limit`` bytes and spilled as sorted runs. Finishing a layer
+    merges the runs, drops duplicates and every record already present in
+    the previous ``dedup_layers`` layers (all of them when None), and writes
+    the result. Layers are memory-mapped when they are read back.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path | str,
+        record_width: int,
+        memory_limit: int,
+        dedup_layers: int | None = None,
+    ) -> None:
+        Path(work_dir).mkdir(parents=True, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix="bfs-", dir=work_dir))
+        self.record_width = record_width
+        self.memory_limit = memory_limit
+        self.dedup_layers = dedup_layers
+        self.sizes: list[int] = []
+        self._buffer: list[bytes] = []
+        self._runs: list[Path] = []
+
+    def _layer_path(self, depth: int) -> Path:
+        return self.directory / f"layer-{depth:06d}.bin"
+
+    def add(self, record: bytes) -> None:
+        """Buffer a candidate for the layer being built."""
+        self._buffer.append(record)
+        if len(self._buffer) * (self.record_width + RECORD_OVERHEAD) >= self.memory_limit:
+            self._spill()
+
+    def _spill(self) -> None:
+        path = self.directory / f"run-{len(self._runs):06d}.bin"
+        self._write(path, _unique(sorted(self._buffer)))
+        self._runs.append(path)
+        self._buffer = []
+
+    def finish_layer(self) -> int:
+        """Write the buffered candidates as the next layer; return its size."""
+        depth = len(self.sizes)
+        self._buffer.sort()
+        candidates = _unique(
+            heapq.merge(self._buffer, *(self._records(run) for run in self._runs))
+        )
+
+        first = 0 if self.dedup_layers is None else max(depth - self.dedup_layers, 0)
+        seen = heapq.merge(*(self.read(previous) for previous in range(first, depth)))
+        size = self._write(self._layer_path(depth), _difference(candidates, seen))
+
+        for run in self._runs:
+            run.unlink()
+        self._runs = []
+        self._buffer = []
+        self.sizes.append(size)
+        return size
+
+    def _write(self, path: Path, records: Iterable[bytes]) -> int:
+        count = 0
+        with open(path, "wb") as file:
+            for record in records:
+                file.write(record)
+                count += 1
+        return count
+
+    def _records(self, path: Path) -> Iterator[bytes]:
+        width = self.record_width
+        if path.stat().st_size == 0:
+            return
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for offset in range(0, len(data), width):
+                yield data[offset : offset + width]
+
+    def read(self, depth: int) -> Iterator[bytes]:
+        """Records of layer ``depth`` in sorted order."""
+        return self._records(self._layer_path(depth))
+
+    def buffered_bytes(self) -> int:
+        """Payload of the candidates held in memory for the layer being built."""
+        return len(self._buffer) * self.record_width
+
+    def nbytes(self) -> int:
+        return sum(self.sizes) * self.record_width
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _unique(records: Iterable[bytes]) -> Iterator[bytes]:
+    previous = None
+    for record in records:
+        if record != previous:
+            yield record
+            previous = record
+
+
+def _difference(records: Iterable[bytes], exclude: Iterable[bytes]) -> Iterator[bytes]:
+    """Sorted ``records`` minus sorted ``exclude``, by a single merge pass."""
+    exclude = iter(exclude)
+    current = next(exclude, None)
+    for record in records:
+        while current is not None and current < record:
+            current = next(exclude, None)
+        if record != current:
+            yield record
@@ -0,0 +1,169 @@
+import os
+import resource
+import sys
+
+from ai.instrumentation import BudgetExceeded
+from ai.node import Node
+from utils.constants import DEFAULT_MEMORY_CHECK_INTERVAL
+
+
+# Search modes that can take over when an in-memory search hits its budget.
+LEANER_MODES = {
+    "bfs": "bfs_external",
+    "bfs_compact": "bfs_external",
+    "bfs_parallel": "bfs_external",
+}
+
+MEMORY_POLICIES = ("stop", "fallback")
+
+# Rough cost of one hash-table slot of the visited and dis tables beyond the
+# key itself, at CPython's usual load factor.
+TABLE_SLOT_BYTES = 32
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss(pid: int | None = None) -> int:
+    """Resident set size in bytes of this process, or of process ``pid``.
+    Where /proc is not available: the peak RSS of this process, and 0 for
+    any other."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        if pid is not None:
+            return 0
+        # ru_maxrss is in KiB on Linux and in bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _container_bytes(value) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(item) for item in value.values() if isinstance(item, (dict, list, set))
+        )
+    if isinstance(value, (list, set)):
+        return sys.getsizeof(value)
+    return 0
+
+
+def node_bytes(node: Node) -> int:
+    """Estimated bytes one search node holds on its own: the Node, its
+    GameState and the board's containers. Entities are shared between a
+    board and its copies and are not counted."""
+    state = node.state
+    board = state.board
+    size = sum(sys.getsizeof(part) + sys.getsizeof(vars(part)) for part in (node, state, board))
+    return size + sum(_container_bytes(value) for value in vars(board).values())
+
+
+class MemoryBudget:
+    """Accounting for the memory a search holds, with a hard RSS ceiling.
+
+    Every ``check_interval`` expansions it estimates the bytes held by the
+    frontier, the visited and dis tables and the expanded nodes kept alive
+    as parents, samples the RSS of the process and of any parallel BFS
+    workers, and raises ``BudgetExceeded`` once either that RSS or the
+    starting RSS plus the estimate passes ``limit`` bytes. The estimate
+    catches growth the RSS sample misses: memory the allocator has not
+    touched yet, or workers whose RSS cannot be read. With the ``fallback``
+    policy a BFS is then rerun in its external-memory mode, whose RAM use
+    is capped; every other search stops with no solution and its partial
+    stats.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        limit: int,
+        policy: str = "stop",
+        check_interval: int = DEFAULT_MEMORY_CHECK_INTERVAL,
+    ) -> None:
+        if policy not in MEMORY_POLICIES:
+            raise ValueError(f"Unknown memory policy: {policy}")
+        self.limit = limit
+        self.policy = policy
+        self.check_interval = check_interval
+        self.baseline_rss = current_rss()
+        self.rss = self.baseline_rss
+        self.peak_rss = self.baseline_rss
+        self.frontier_bytes = 0
+        self.visited_bytes = 0
+        self.parent_bytes = 0
+        self.exceeded = False
+        self._node_bytes: int | None = None
+        self._entry_bytes: int | None = None
+
+    def _sample_sizes(self, search, root: Node | None) -> None:
+        if self._node_bytes is None and root is not None:
+            self._node_bytes = node_bytes(root)
+        if self._entry_bytes is None:
+            key = next(iter(search.visited), None)
+            if key is None:
+                key = next(iter(search.dis), None)
+            if key is not None:
+                self._entry_bytes = sys.getsizeof(key) + TABLE_SLOT_BYTES
+
+    def account(self, search, root: Node | None, frontier: int, expanded: int) -> None:
+        """Refresh the estimates and the RSS sample for ``search`` started
+        from ``root``."""
+        self._sample_sizes(search, root)
+        entry = self._entry_bytes or 0
+        self.visited_bytes = (len(search.visited) + len(search.dis)) * entry
+
+        if search.arena is not None:
+            # Packed states: the arena is the frontier, the parent table and
+            # the visited table.
+            self.frontier_bytes = 0
+            self.parent_bytes = search.arena.nbytes()
+        elif search.layers is not None:
+            # Layers live on disk; only the one being built is in memory.
+            self.frontier_bytes = search.layers.buffered_bytes()
+            self.parent_bytes = 0
+        elif search.parallel is not None:
+            # The workers' shards map each state key to its parent's key and
+            # a direction byte; the frontier only lists keys of the shards.
+            width = search.parallel.codec.key_width
+            entry = sys.getsizeof(bytes(width)) + sys.getsizeof(bytes(width + 1)) + TABLE_SLOT_BYTES
+            self.visited_bytes = search.parallel.num_of_visited_states * entry
+            self.frontier_bytes = 0
+            self.parent_bytes = 0
+        else:
+            node = self._node_bytes or 0
+            self.frontier_bytes = frontier * node
+            self.parent_bytes = expanded * node
+
+        self.rss = current_rss()
+        if search.parallel is not None:
+            self.rss += sum(current_rss(process.pid) for process in search.parallel.processes)
+        if self.rss > self.peak_rss:
+            self.peak_rss = self.rss
+
+    def check(self, stats, frontier: int) -> None:
+        self.account(stats.search, stats.root, frontier, stats.expanded)
+        # Once exceeded, only accounting goes on: the mode that took over
+        # keeps its own memory ceiling.
+        projected = self.baseline_rss + self.estimated_bytes()
+        if self.exceeded or max(self.rss, projected) <= self.limit:
+            return
+        self.exceeded = True
+        raise BudgetExceeded(
+            f"memory budget of {self.limit / 2**20:.0f} MiB exceeded "
+            f"(RSS {self.rss / 2**20:.0f} MiB, estimated {projected / 2**20:.0f} MiB)"
+        )
+
+    def estimated_bytes(self) -> int:
+        return self.frontier_bytes + self.visited_bytes + self.parent_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "limit": self.limit,
+            "policy": self.policy,
+            "exceeded": self.exceeded,
+            "peak_rss": self.peak_rss,
+            "frontier_bytes": self.frontier_bytes,
+            "visited_bytes": self.visited_bytes,
+            "parent_bytes": self.parent_bytes,
+        }
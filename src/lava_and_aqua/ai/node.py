@@ -11,13 +11,11 @@ class Node:
     def __len__(self): return 0 if self.parent is None else (1 + len(self.parent))
     
     
-    def expand(self, problem):
-        "Expand a node, generating the children nodes."
+    def expand(self, successors):
+        "Expand a node, generating the children nodes from successors(state)."
         s = self.state
         sons = deque()
-        for action in problem.actions(s):
-            # No need to deepcopy - update_state now handles copying internally
-            s1 = problem.result(s, action)
+        for action, s1, _ in successors(s):
             sons.append(Node(s1, self, action, self.path_cost + 1))
         return sons
             
@@ -34,7 +32,7 @@ class Node:
     
 
     def ucs_cost(self):
-        return len(self.state.board.get_entities_by_type(EntityType.LAVA))
+        return self.state.board.count_entities_of_type(EntityType.LAVA)
     
 
     # goal_list = node.state.board.get_entities_by_type(EntityType.GOAL)
@@ -44,4 +42,7 @@ class Node:
         player_pos = self.state.get_player().position.to_tuple()
         px, py = player_pos
         gx, gy = goal_pos
-        return abs(px - gx) + abs(py - gy)
\ No newline at end of file
+        return abs(px - gx) + abs(py - gy)
+
+    def distance_field_to_the_goal(self, field) -> int:
+        return field.distance(self.state.get_player().position)
@@ -0,0 +1,186 @@
+import multiprocessing
+from multiprocessing.connection import Connection
+
+import xxhash
+
+from ai.arena import DIRECTION_CODES, DIRECTIONS
+from core.codec import StateCodec
+from core.observer import Observer
+from core.state import GameState, MOVE_ACTIONS
+from core.action import MoveAction
+from utils.types import GamePhase
+
+
+# Direction code of the start state, which has no parent.
+ROOT = 0xFF
+
+
+def owner(key: bytes, workers: int) -> int:
+    """Worker whose shard of the visited set holds ``key``."""
+    return xxhash.xxh3_64_intdigest(key) % workers
+
+
+class Shard:
+    """One worker's part of a layer-synchronous BFS.
+
+    Records exchanged between workers are ``child + parent + direction``:
+    two fixed-width state keys and one direction byte, concatenated into a
+    single ``bytes`` batch per destination so only flat buffers are pickled.
+    """
+
+    def __init__(self, problem, codec: StateCodec, workers: int) -> None:
+        self.problem = problem
+        self.codec = codec
+        self.workers = workers
+        self.width = codec.key_width
+        self.record_width = 2 * codec.key_width + 1
+        # state key -> parent key + direction byte
+        self.visited: dict[bytes, bytes] = {}
+        self.frontier: list[bytes] = []
+
+    def expand(self) -> tuple[int, int, bytes | None, list[bytes]]:
+        """Expand the frontier; return (expanded, created, winning record,
+        batches)."""
+        batches = [bytearray() for _ in range(self.workers)]
+        expanded = created = 0
+        for key in self.frontier:
+            expanded += 1
+            state = self.codec.decode(key)
+            for action, child, phase in self.problem.successors(state):
+                created += 1
+                if phase == GamePhase.LOST:
+                    continue
+                record = (
+                    self.codec.encode_fixed(child)
+                    + key
+                    + bytes((DIRECTION_CODES[action.direction],))
+                )
+                if phase == GamePhase.WON:
+                    return expanded, created, record, []
+                batches[owner(record[: self.width], self.workers)] += record
+        self.frontier = []
+        return expanded, created, None, [bytes(batch) for batch in batches]
+
+    def absorb(self, batches: list[bytes]) -> tuple[int, int]:
+        """Keep the records not seen before as the next frontier; return
+        the frontier and visited sizes."""
+        width, record_width = self.width, self.record_width
+        for batch in batches:
+            for offset in range(0, len(batch), record_width):
+                key = batch[offset : offset + width]
+                if key not in self.visited:
+                    self.visited[key] = batch[offset + width : offset + record_width]
+                    self.frontier.append(key)
+        return len(self.frontier), len(self.visited)
+
+
+def _serve(conn: Connection, problem, codec: StateCodec, workers: int, spread_mode: str) -> None:
+    Observer.spread_mode = spread_mode
+    shard = Shard(problem, codec, workers)
+    while True:
+        command, argument = conn.recv()
+        if command == "expand":
+            conn.send(shard.expand())
+        elif command == "absorb":
+            conn.send(shard.absorb(argument))
+        elif command == "parent":
+            conn.send(shard.visited.get(argument))
+        else:
+            conn.close()
+            return
+
+
+class ParallelBFS:
+    """Layer-synchronous BFS over ``workers`` processes, each owning the
+    states whose key hashes to it. Experimental: it has only been timed on
+    a single core, where the extra workers just add their messaging.
+
+    Every layer, each worker expands its own frontier and returns its
+    children batched by owner; the batches are then handed to their owners,
+    which drop the ones they have seen and keep the rest as their frontier.
+
+    ``run`` reports every layer to ``on_layer(generated, frontier, visited,
+    expanded)``, the signature of ``SearchStats.expansion``. An exception raised there ends the search between layers,
+    when no worker is mid-reply, so ``close`` can still stop them cleanly.
+    """
+
+    def __init__(self, problem, start_state: GameState, workers: int) -> None:
+        self.codec = StateCodec(start_state)
+        self.start_state = self.codec.decode(self.codec.encode(start_state))
+        self.workers = workers
+        self.num_of_expanded_states = 0
+        self.num_of_created_nodes = 0
+        self.num_of_visited_states = 0
+
+        context = multiprocessing.get_context()
+        self.connections: list[Connection] = []
+        self.processes = []
+        for _ in range(workers):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(
+                target=_serve,
+                args=(child_end, problem, self.codec, workers, Observer.spread_mode),
+                daemon=True,
+            )
+            process.start()
+            child_end.close()
+            self.connections.append(parent_end)
+            self.processes.append(process)
+
+    def _ask_all(self, command: str, arguments=None) -> list:
+        for index, conn in enumerate(self.connections):
+            conn.send((command, None if arguments is None else arguments[index]))
+        return [conn.recv() for conn in self.connections]
+
+    def _absorb(self, routed: list[list[bytes]]) -> int:
+        sizes = self._ask_all("absorb", routed)
+        self.num_of_visited_states = sum(visited for _, visited in sizes)
+        return sum(frontier for frontier, _ in sizes)
+
+    def run(self, on_layer=None) -> list[tuple[MoveAction, bytes]] | None:
+        """Search; return the (action, state key) steps of a shortest solution."""
+        width = self.codec.key_width
+        start = self.codec.encode_fixed(self.start_state)
+        root = [b""] * self.workers
+        root[owner(start, self.workers)] = start + bytes(width) + bytes((ROOT,))
+        frontier = self._absorb([[batch] for batch in root])
+
+        while frontier:
+            replies = self._ask_all("expand")
+            expanded = sum(reply[0] for reply in replies)
+            created = sum(reply[1] for reply in replies)
+            self.num_of_expanded_states += expanded
+            self.num_of_created_nodes += created
+
+            goals = [record for _, _, record, _ in replies if record is not None]
+            if goals:
+                if on_layer is not None:
+                    on_layer(created, 0, self.num_of_visited_states, expanded)
+                return self._path(min(goals))
+
+            routed = [[reply[3][index] for reply in replies] for index in range(self.workers)]
+            frontier = self._absorb(routed)
+            if on_layer is not None:
+                on_layer(created, frontier, self.num_of_visited_states, expanded)
+
+        return None
+
+    def _path(self, record: bytes) -> list[tuple[MoveAction, bytes]]:
+        width = self.codec.key_width
+        key, link = record[:width], record[width:]
+        steps = []
+        while link[-1] != ROOT:
+            steps.append((MOVE_ACTIONS[DIRECTIONS[link[-1]]], key))
+            key = link[:width]
+            conn = self.connections[owner(key, self.workers)]
+            conn.send(("parent", key))
+            link = conn.recv()
+        steps.reverse()
+        return steps
+
+    def close(self) -> None:
+        for conn in self.connections:
+            conn.send(("stop", None))
+            conn.close()
+        for process in self.processes:
+            process.join()
@@ -0,0 +1,169 @@
+import csv
+import multiprocessing
+import os
+import queue
+import time
+
+from ai.arena import DIRECTION_CODES, DIRECTIONS
+from ai.node import Node
+from ai.problem import Problem
+from ai.search import SearchAlgorithm
+from core.observer import Observer
+from core.state import MOVE_ACTIONS, GameState
+from utils.constants import (
+    DEFAULT_HEURISTIC,
+    DEFAULT_PORTFOLIO_BUDGET,
+    DEFAULT_PORTFOLIO_MODE,
+    DEFAULT_PORTFOLIO_STRATEGIES,
+    DEFAULT_STATE_KEY_MODE,
+)
+
+
+PORTFOLIO_MODES = ("first", "best")
+
+# How often the race checks for strategies that died without a result.
+POLL_SECONDS = 0.5
+
+# Strategies that take a heuristic argument.
+INFORMED_STRATEGIES = ("hill_climbing_backtrack", "a_star")
+
+
+def _run_strategy(
+    strategy: str,
+    problem: Problem,
+    start_state: GameState,
+    key_mode: str,
+    heuristic: str,
+    spread_mode: str,
+    results,
+) -> None:
+    Observer.spread_mode = spread_mode
+    search = SearchAlgorithm(problem, key_mode)
+    arguments = {"heuristic": heuristic} if strategy in INFORMED_STRATEGIES else {}
+
+    started = time.perf_counter()
+    getattr(search, strategy)(Node(start_state), **arguments)
+    duration = time.perf_counter() - started
+
+    directions = None
+    if search.solution is not None:
+        directions = [DIRECTION_CODES[action.direction] for action in search.solution.path_actions()]
+    results.put((strategy, directions, duration, search.num_of_created_nodes))
+
+
+class Portfolio:
+    """Race several search strategies on one level, one process each.
+
+    In ``first`` mode the first solution wins; in ``best`` mode the shortest
+    solution found before every strategy finishes or ``time_budget`` runs
+    out wins, ties going to the earlier one. The remaining processes are
+    terminated either way. ``outcomes`` holds, per finished strategy, the
+    solution length (None without one), the seconds it took and the nodes
+    it created.
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        strategies: tuple[str, ...] = DEFAULT_PORTFOLIO_STRATEGIES,
+        mode: str = DEFAULT_PORTFOLIO_MODE,
+        time_budget: float | None = DEFAULT_PORTFOLIO_BUDGET,
+        key_mode: str = DEFAULT_STATE_KEY_MODE,
+        heuristic: str = DEFAULT_HEURISTIC,
+    ) -> None:
+        if mode not in PORTFOLIO_MODES:
+            raise ValueError(f"Unknown portfolio mode: {mode}")
+        for strategy in strategies:
+            if not callable(getattr(SearchAlgorithm, strategy, None)):
+                raise ValueError(f"Unknown search strategy: {strategy}")
+
+        self.problem = problem
+        self.strategies = strategies
+        self.mode = mode
+        self.time_budget = time_budget
+        self.key_mode = key_mode
+        self.heuristic = heuristic
+        self.solution: Node | None = None
+        self.winner: str | None = None
+        self.outcomes: dict[str, tuple[int | None, float, int]] = {}
+
+    def run(self, start_node: Node) -> Node | None:
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = {
+            strategy: context.Process(
+                target=_run_strategy,
+                args=(
+                    strategy,
+                    self.problem,
+                    start_node.state,
+                    self.key_mode,
+                    self.heuristic,
+                    Observer.spread_mode,
+                    results,
+                ),
+                daemon=True,
+            )
+            for strategy in self.strategies
+        }
+        for process in processes.values():
+            process.start()
+
+        deadline = None if self.time_budget is None else time.monotonic() + self.time_budget
+        best: list[int] | None = None
+
+        try:
+            while len(self.outcomes) < len(processes):
+                timeout = POLL_SECONDS
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        break
+                try:
+                    strategy, directions, duration, created = results.get(timeout=timeout)
+                except queue.Empty:
+                    # A strategy that crashed never reports; stop waiting
+                    # once nothing is left running.
+                    if not any(process.is_alive() for process in processes.values()):
+                        break
+                    continue
+
+                moves = None if directions is None else len(directions)
+                self.outcomes[strategy] = (moves, duration, created)
+                if directions is not None and (best is None or len(directions) < len(best)):
+                    best = directions
+                    self.winner = strategy
+                    if self.mode == "first":
+                        break
+        finally:
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        if best is not None:
+            self.solution = self._replay(start_node, best)
+        return self.solution
+
+    def _replay(self, start_node: Node, directions: list[int]) -> Node:
+        node = start_node
+        for code in directions:
+            action = MOVE_ACTIONS[DIRECTIONS[code]]
+            node = Node(node.state.update_state(action), node, action, node.path_cost + 1)
+        return node
+
+    def record(self, game_level: str, csv_file_path: str = "statistics/portfolio.csv") -> None:
+        """Append the winner and every finished strategy's outcome for ``game_level``."""
+        os.makedirs(os.path.dirname(csv_file_path) or ".", exist_ok=True)
+        file_exists = os.path.exists(csv_file_path)
+        with open(csv_file_path, mode="a", newline="") as file:
+            writer = csv.writer(file)
+            if not file_exists:
+                writer.writerow(
+                    ["game_level", "mode", "strategy", "winner", "number of moves", "Duration", "Number of created nodes"]
+                )
+            for strategy in self.strategies:
+                moves, duration, created = self.outcomes.get(strategy, (None, None, None))
+                writer.writerow(
+                    [game_level, self.mode, strategy, strategy == self.winner, moves, duration, created]
+                )
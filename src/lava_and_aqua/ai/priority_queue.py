@@ -1,4 +1,5 @@
 import heapq
+from collections import deque
 
 
 class PriorityQueue:
@@ -25,3 +26,52 @@ class PriorityQueue:
 
     def __bool__(self):
         return bool(self._heap)
+
+
+class BucketQueue:
+    """Priority queue for small integer priorities.
+
+    Items sharing a ``(priority, tie)`` pair live in one FIFO bucket, and only
+    the distinct pairs are kept in a heap, so pops are deterministic: lowest
+    priority first, then lowest ``tie``, then insertion order. Superseded
+    entries are not removed; callers skip them on pop (lazy deletion).
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._buckets = {}
+        self._size = 0
+
+    def add(self, priority, item, tie=0):
+        key = (priority, tie)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = deque()
+            heapq.heappush(self._keys, key)
+        bucket.append(item)
+        self._size += 1
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop from an empty bucket queue")
+        key = self._keys[0]
+        bucket = self._buckets[key]
+        item = bucket.popleft()
+        if not bucket:
+            del self._buckets[key]
+            heapq.heappop(self._keys)
+        self._size -= 1
+        return key[0], item
+
+    def entries(self):
+        """Yield every ``(priority, tie, item)`` in pop order; adding them
+        back in this order rebuilds an equal queue."""
+        for key in sorted(self._buckets):
+            for item in self._buckets[key]:
+                yield key[0], key[1], item
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
@@ -1,4 +1,8 @@
+from ai.heuristics import DistanceField, PatternDatabase
+from ai.pruning import LavaDeadlines
+from core.engine import GameEngine
 from core.state import GameState
+from utils.constants import DEFAULT_LAVA_PRUNING
 
 
 class Problem:
@@ -10,17 +14,57 @@ class Problem:
     def result(self, state, action): raise NotImplementedError
     def is_over(self, state):        return NotImplementedError
     # def h(self, node):               return 0
+
+    def successors(self, state, engine=None):
+        "Yield (action, child_state, phase) for every valid action; engine is for game problems."
+        for action in self.actions(state):
+            child = self.result(state, action)
+            yield action, child, child.phase
     
     
 class LavaAndAquaProblem(Problem):
-    def __init__(self, initial=None):
+    def __init__(self, initial=None, lava_pruning: bool = DEFAULT_LAVA_PRUNING):
         super().__init__(initial=initial)
+        # Static level geometry, computed once and shared by every node.
+        self.distance_field = (
+            DistanceField(initial.board) if initial is not None else None
+        )
+        self.lava_deadlines = (
+            LavaDeadlines(initial, self.distance_field)
+            if initial is not None and lava_pruning
+            else None
+        )
+        self._pattern_database = None
+
+    def pattern_database(self) -> PatternDatabase:
+        """Orb-aware heuristic table, built or loaded from disk on first use."""
+        if self._pattern_database is None:
+            self._pattern_database = PatternDatabase(self.initial)
+        return self._pattern_database
 
     def actions(self, state: GameState):
         return state.get_available_actions()
     
     def result(self, state, action):
         return state.update_state(action)
+
+    def successors(self, state: GameState, engine=GameEngine):
+        deadlines = self.lava_deadlines
+        for action, child in state.successors(engine):
+            if (
+                deadlines is not None
+                and not child.is_terminal()
+                and deadlines.is_doomed(child)
+            ):
+                deadlines.num_of_pruned_states += 1
+                continue
+            yield action, child, child.phase
+
+    def num_of_pruned_states(self) -> int:
+        """Children dropped at generation because lava cuts them off."""
+        if self.lava_deadlines is None:
+            return 0
+        return self.lava_deadlines.num_of_pruned_states
     
     def is_over(self, state: GameState):
         return state.is_terminal()
\ No newline at end of file
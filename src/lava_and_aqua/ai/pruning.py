@@ -0,0 +1,199 @@
+from array import array
+from collections import deque
+
+from ai.heuristics import UNREACHABLE, DistanceField, permanent_obstacle_cells
+from core.board import Board
+from core.engine import GameEngine
+from core.entitiy import Position
+from core.state import GameState
+from utils.types import Direction, EntityType
+
+
+NEVER = 2**31 - 1
+
+# Cells the player can never stand on once they hold one of these.
+HAZARDS = (EntityType.LAVA, EntityType.WALL)
+
+
+def fluid_key(board: Board) -> tuple:
+    """Everything the fluid spread depends on; the player and orbs are not part of it."""
+    masks = board.layer_masks()
+    doors = sorted(
+        (door.position.y * board.width + door.position.x, door.remaining_time)
+        for door in board.get_entities_by_type(EntityType.TIMED_DOOR)
+    )
+    return (
+        masks.get(EntityType.LAVA, 0),
+        masks.get(EntityType.WATER, 0),
+        masks.get(EntityType.WALL, 0),
+        masks.get(EntityType.METAL_BOX, 0),
+        tuple(doors),
+    )
+
+
+class LavaDeadlines:
+    """Prunes states from which the goal or a remaining orb can no longer be
+    reached before lava (or a collision wall) gets there.
+
+    Until a box is pushed, the fluids evolve the same way whatever the player
+    does, so one simulation of the spread from a state gives the turn each
+    cell turns deadly for every state on that timeline. Timelines are cached
+    by ``fluid_key``: a child that did not push a box finds its parent's
+    timeline one turn further on, and a push starts a new simulation.
+
+    The reachability check is a BFS over (cell, turn) that only enters a cell
+    before its deadline. Stepping onto a box would push it and change the
+    timeline, so from there on only the level's permanent walls are assumed;
+    doors are assumed open. Both keep the check from pruning a solvable state.
+    """
+
+    def __init__(self, initial: GameState, distance_field: DistanceField) -> None:
+        board = initial.board
+        self.distance_field = distance_field
+        self.width = board.width
+        self.height = board.height
+        self.cells = board.width * board.height
+        self.blocked = permanent_obstacle_cells(board)
+        self.components = self._components()
+        self.timelines: dict[tuple, tuple[array, int]] = {}
+        self.num_of_pruned_states = 0
+
+        self.neighbours: list[tuple[int, ...]] = []
+        for cell in range(self.cells):
+            position = Position(cell % self.width, cell // self.width)
+            cell_neighbours = []
+            for direction in Direction:
+                neighbour = position.move(direction.dx, direction.dy)
+                if board.is_within_bounds(neighbour):
+                    cell_neighbours.append(neighbour.y * self.width + neighbour.x)
+            self.neighbours.append(tuple(cell_neighbours))
+
+        # The per-level arrival map: the timeline of the initial state.
+        if board.has_entity_of_type(EntityType.LAVA):
+            self.timeline(board)
+
+    def _components(self) -> array:
+        """Connected regions of the grid around permanent obstacles."""
+        labels = array("i", [-1]) * self.cells
+        label = 0
+        for start in range(self.cells):
+            if self.blocked[start] or labels[start] != -1:
+                continue
+            labels[start] = label
+            frontier = deque([start])
+            while frontier:
+                cell = frontier.popleft()
+                x, y = cell % self.width, cell // self.width
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if 0 <= nx < self.width and 0 <= ny < self.height:
+                        neighbour = ny * self.width + nx
+                        if not self.blocked[neighbour] and labels[neighbour] == -1:
+                            labels[neighbour] = label
+                            frontier.append(neighbour)
+            label += 1
+        return labels
+
+    def timeline(self, board: Board, key: tuple | None = None) -> tuple[array, int]:
+        """Return ``(deadlines, turn)`` for ``board``.
+
+        ``deadlines[cell]`` is the first turn of the timeline at which the cell
+        holds lava or a wall, and ``turn`` is where ``board`` sits on it.
+        """
+        if key is None:
+            key = fluid_key(board)
+        start_key = key
+        cached = self.timelines.get(key)
+        if cached is not None:
+            return cached
+
+        deadlines = array("i", [NEVER]) * self.cells
+        for cell in range(self.cells):
+            if self.blocked[cell]:
+                deadlines[cell] = 0
+
+        board = board.copy()
+        seen = 0
+        limit = self.cells + max((door[1] for door in key[4]), default=0) + 1
+        for turn in range(limit):
+            masks = board.layer_masks()
+            hazards = 0
+            for entity_type in HAZARDS:
+                hazards |= masks.get(entity_type, 0)
+            fresh = hazards & ~seen
+            seen |= hazards
+            while fresh:
+                low = fresh & -fresh
+                deadlines[low.bit_length() - 1] = turn
+                fresh ^= low
+
+            self.timelines.setdefault(key, (deadlines, turn))
+
+            GameEngine.spread_lava_and_water(board)
+            GameEngine.tick_TIMED_DOORs(board)
+            next_key = fluid_key(board)
+            if next_key == key:
+                break
+            key = next_key
+
+        return self.timelines[start_key]
+
+    def is_doomed(self, state: GameState) -> bool:
+        board = state.board
+        if not board.has_entity_of_type(EntityType.LAVA):
+            return False
+
+        player = state.get_player()
+        goal = board.goal_position()
+        if player is None or goal is None:
+            return False
+
+        key = fluid_key(board)
+        deadlines, turn = self.timeline(board, key)
+        goal_cell = goal.y * self.width + goal.x
+        targets = {
+            orb.position.y * self.width + orb.position.x
+            for orb in board.get_entities_by_type(EntityType.PORTAL_ORB)
+        }
+        targets.add(goal_cell)
+        boxes = key[3]
+
+        start = player.position.y * self.width + player.position.x
+        arrival = {start: turn}
+        frontier = deque([start])
+        reached: set[int] = set()
+        pushed_components: set[int] = set()
+
+        while frontier:
+            cell = frontier.popleft()
+            now = arrival[cell]
+            for neighbour in self.neighbours[cell]:
+                # The win is checked before the spread, so the goal only has
+                # to be free of lava on the turn it is entered from.
+                if neighbour == goal_cell and now < deadlines[neighbour]:
+                    reached.add(neighbour)
+                if neighbour in arrival or now + 1 >= deadlines[neighbour]:
+                    continue
+                if boxes >> neighbour & 1:
+                    pushed_components.add(self.components[neighbour])
+                    continue
+                if neighbour in targets:
+                    reached.add(neighbour)
+                arrival[neighbour] = now + 1
+                frontier.append(neighbour)
+
+        for target in targets - reached:
+            if self.components[target] not in pushed_components:
+                return True
+
+        # Without a push the timeline is fixed: every orb still has to be
+        # walked to the goal before lava reaches it.
+        if not pushed_components and deadlines[goal_cell] != NEVER:
+            for target in targets:
+                if target == goal_cell:
+                    continue
+                remaining = self.distance_field.distances[target]
+                if remaining == UNREACHABLE:
+                    return True
+                if arrival[target] + remaining > deadlines[goal_cell]:
+                    return True
+        return False
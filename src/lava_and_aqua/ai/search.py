@@ -1,23 +1,220 @@
 from collections import deque
 import csv
+import inspect
 import os
+import sys
+import xxhash
+from ai.arena import StateArena
+from ai.checkpoint import CHECKPOINT_MODES, read_checkpoint, write_checkpoint
+from ai.dominance import DominanceIndex
+from ai.heuristics import HEURISTICS, UNREACHABLE
+from ai.instrumentation import SearchLimits, SearchStats, instrumented
+from ai.memory import LEANER_MODES, MemoryBudget
+from ai.layers import LayerStore
+from ai.parallel import ParallelBFS
 from ai.node import Node
-from ai.priority_queue import PriorityQueue
-from utils.types import EntityType, GamePhase
+from ai.priority_queue import BucketQueue, PriorityQueue
+from utils.constants import (
+    DEFAULT_BFS_WORKERS,
+    DEFAULT_DOMINANCE,
+    DEFAULT_HEURISTIC,
+    DEFAULT_STATE_KEY_MODE,
+    EXTERNAL_BFS_DEDUP_LAYERS,
+    EXTERNAL_BFS_DIR,
+    EXTERNAL_BFS_MEMORY_LIMIT,
+)
+from core.codec import StateCodec
+from core.state import MOVE_ACTIONS
+from utils.types import GamePhase
 from utils.rendering import print_board
 from .problem import Problem
 
 
+STATE_KEY_MODES = ("exact", "digest", "hash")
+
+STATISTICS_HEADER = [
+    "Duration",
+    "Number of created nodes",
+    "Number of visited nodes",
+    "number of moves",
+    "game_level",
+]
+
+
+def append_statistics_row(csv_file_path: str, row: list) -> None:
+    """Append ``row`` to a ``statistics/`` table, writing the header first if
+    the file is new."""
+    os.makedirs(os.path.dirname(csv_file_path) or ".", exist_ok=True)
+    file_exists = os.path.exists(csv_file_path)
+
+    with open(csv_file_path, mode="a", newline="") as file:
+        writer = csv.writer(file)
+        if not file_exists:
+            writer.writerow(STATISTICS_HEADER)
+        writer.writerow(row)
+
+
 class SearchAlgorithm:
-    def __init__(self, problem: Problem) -> None:
+    def __init__(
+        self,
+        problem: Problem,
+        key_mode: str = DEFAULT_STATE_KEY_MODE,
+        dominance: bool = DEFAULT_DOMINANCE,
+        stats: SearchStats | None = None,
+        memory_budget: MemoryBudget | None = None,
+        limits: SearchLimits | None = None,
+        checkpoint_path: str | None = None,
+    ) -> None:
+        if key_mode not in STATE_KEY_MODES:
+            raise ValueError(f"Unknown state key mode: {key_mode}")
         self.problem: Problem = problem
+        self.key_mode: str = key_mode
         self.solution: Node = None
         self.num_of_created_nodes: int = 1
+        self.num_of_stale_pops: int = 0
+        # Consulted by bfs, ucs and a_star when a state is closed.
+        self.dominance: DominanceIndex | None = DominanceIndex() if dominance else None
+        self.num_of_dominated_states: int = 0
+        # Packed states of the compact search mode, see bfs_compact.
+        self.arena: StateArena | None = None
+        # On-disk layers of the external-memory mode, see bfs_external.
+        self.layers: LayerStore | None = None
+        # Worker pool of the parallel mode, see bfs_parallel.
+        self.parallel: ParallelBFS | None = None
+        # Counters, phase timers and progress reports; None keeps the search
+        # loops free of instrumentation.
+        self.stats: SearchStats | None = stats
+        # Checked through the stats, which are kept for it if none were given.
+        self.memory_budget: MemoryBudget | None = memory_budget
+        self.limits: SearchLimits | None = limits
+        for budget in (memory_budget, limits):
+            if budget is not None:
+                if self.stats is None:
+                    self.stats = SearchStats(timers=False)
+                self.stats.add_budget(budget)
+        # Stats kept only to check budgets are not printed with the results.
+        self.report_stats: bool = stats is not None
+        # Where a search stopped by a budget saves its state, see resume.
+        self.checkpoint_path: str | None = checkpoint_path
+        # Open nodes of the running search (bfs_compact: the arena entries
+        # from arena_head on), for checkpoints.
+        self.frontier = None
+        self.arena_head: int = 0
+        # Frontier read from a checkpoint, taken over by the next search.
+        self.restored = None
         self.visited: set = set()
         self.start_time: float = None
         self.end_time: float = None
         self.dis: dict = {}
 
+    def state_key(self, state) -> bytes | int:
+        """Key a state for the visited/dis tables according to ``key_mode``."""
+        if self.key_mode == "hash":
+            return hash(state)
+        if self.key_mode == "digest":
+            return xxhash.xxh3_128_intdigest(state.state_key())
+        return state.state_key()
+
+    def successors(self, state):
+        """``problem.successors(state)``; while stats time a run, the run
+        shadows this with a timed version, see ``SearchStats.start``."""
+        return self.problem.successors(state)
+
+    def goal_heuristic(self, heuristic: str, goal_position):
+        """Return ``node -> estimated moves to the goal``, or None when the
+        goal can no longer be reached from the node."""
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
+
+        if heuristic == "distance_field":
+            field = self.problem.distance_field
+
+            def estimate(node: Node) -> int | None:
+                distance = node.distance_field_to_the_goal(field)
+                return None if distance == UNREACHABLE else distance
+
+            return estimate
+
+        if heuristic == "pattern_db":
+            database = self.problem.pattern_database()
+            return lambda node: database.distance(node.state.get_player())
+
+        goal = goal_position.to_tuple()
+        return lambda node: node.distance_to_the_goal(goal)
+
+    def visited_count(self) -> int:
+        """States the search has seen: the visited table's, or those of the
+        arena or the layer files in the modes that keep no table."""
+        if self.arena is not None:
+            return len(self.arena)
+        if self.layers is not None:
+            return sum(self.layers.sizes)
+        return len(self.visited)
+
+    def visited_bytes_per_entry(self) -> float:
+        """Average bytes held per entry of the visited and dis tables."""
+        entries = len(self.visited) + len(self.dis)
+        if entries == 0:
+            return 0.0
+        size = sys.getsizeof(self.visited) + sys.getsizeof(self.dis)
+        size += sum(sys.getsizeof(key) for key in self.visited)
+        size += sum(sys.getsizeof(key) for key in self.dis)
+        return size / entries
+
+    def budget_exceeded(self, mode: str, start_node: Node, *args, **kwargs) -> None:
+        """Called once a budget has stopped search ``mode``. Under the
+        memory budget's ``fallback`` policy a BFS is rerun from
+        ``start_node`` in external-memory mode, buffering at most a quarter
+        of the budget; otherwise the search stays stopped, and is written to
+        ``checkpoint_path`` if set and the mode supports it."""
+        budget = self.memory_budget
+        leaner = LEANER_MODES.get(mode)
+        if budget is None or not budget.exceeded or budget.policy != "fallback" or leaner is None:
+            self.save_checkpoint(mode, start_node, *args, **kwargs)
+            return
+
+        self.visited = set()
+        self.dis = {}
+        self.arena = None
+        self.parallel = None
+        # The external mode keys states exactly and prunes nothing.
+        self.key_mode = "exact"
+        self.dominance = None
+        self.stats.stopped += f"; continued as {leaner}"
+        getattr(self, leaner)(
+            start_node, memory_limit=min(EXTERNAL_BFS_MEMORY_LIMIT, budget.limit // 4)
+        )
+
+    def save_checkpoint(self, mode: str, start_node: Node, *args, **kwargs) -> None:
+        if self.checkpoint_path is None or mode not in CHECKPOINT_MODES:
+            return
+        bound = inspect.signature(getattr(self, mode)).bind(start_node, *args, **kwargs)
+        arguments = dict(bound.arguments)
+        del arguments["start_node"]
+        write_checkpoint(self.checkpoint_path, self, mode, start_node, arguments)
+        self.stats.stopped += f"; checkpoint written to {self.checkpoint_path}"
+
+    def resume(self, checkpoint_path: str, start_node: Node) -> str:
+        """Continue the search saved in ``checkpoint_path`` from the level
+        starting at ``start_node``, with this search's budgets, and return
+        its mode. The dominance index is not saved and starts out empty."""
+        mode, arguments, self.restored = read_checkpoint(checkpoint_path, self, start_node)
+        getattr(self, mode)(start_node, **arguments)
+        return mode
+
+    def take_restored(self):
+        restored, self.restored = self.restored, None
+        return restored
+
+    def is_dominated(self, node: Node, cost: int) -> bool:
+        """Close ``node`` in the dominance index, if enabled; True when pruned."""
+        if self.dominance is None or self.dominance.add(node.state, cost):
+            return False
+        self.num_of_dominated_states += 1
+        if self.stats is not None:
+            self.stats.pruned += 1
+        return True
+
     def print_search_details(self, algorithm_name: str) -> None:
         if self.solution is not None:
             duration: float = self.end_time - self.start_time
@@ -27,10 +224,38 @@ class SearchAlgorithm:
             print(f"{algorithm_name} Statistics:\n")
             print(f"Duration: {duration} seconds")
             print(f"Number of created nodes: {self.num_of_created_nodes}")
-            print(f"Number of visited nodes: {len(self.visited)}")
+            print(f"Number of visited nodes: {self.visited_count()}")
+            print(
+                f"Bytes per visited entry ({self.key_mode} keys): "
+                f"{self.visited_bytes_per_entry():.1f}"
+            )
+            print(f"Stale queue entries skipped: {self.num_of_stale_pops}")
+            if self.parallel is not None:
+                print(
+                    f"States in {self.parallel.workers} worker shards: "
+                    f"{self.parallel.num_of_visited_states}"
+                )
+            if self.layers is not None:
+                print(
+                    f"States written to layer files: {sum(self.layers.sizes)} "
+                    f"({self.layers.record_width} bytes each)"
+                )
+            if self.arena is not None:
+                print(
+                    f"Bytes per arena entry (encoding + parent + action + index): "
+                    f"{self.arena.nbytes() / max(len(self.arena), 1):.1f}"
+                )
+            if self.dominance is not None:
+                print(f"Dominated states pruned: {self.num_of_dominated_states}")
+            if hasattr(self.problem, "num_of_pruned_states"):
+                print(f"States pruned by lava deadlines: {self.problem.num_of_pruned_states()}")
             print(f"Num of moves: {self.solution.path_cost}")
         else:
             print("No solution found")
+        if self.stats is not None and self.stats.stopped is not None:
+            print(f"Search stopped: {self.stats.stopped}")
+        if self.report_stats:
+            print(f"Search stats: {self.stats.to_json(indent=2)}")
 
     def save_search_details_to_csv(self, algorithm_name: str, game_level: str) -> None:
         if self.solution is None:
@@ -39,58 +264,113 @@ class SearchAlgorithm:
         duration = self.end_time - self.start_time
         csv_file_path = f"statistics/{algorithm_name}.csv"
 
-        # Check if file exists to determine if we need to write headers
-        file_exists = os.path.exists(csv_file_path)
-
-        with open(csv_file_path, mode="a", newline="") as file:
-            writer = csv.writer(file)
-
-            # Write headers if file is new
-            if not file_exists:
-                writer.writerow(
-                    [
-                        "Duration",
-                        "Number of created nodes",
-                        "Number of visited nodes",
-                        "number of moves",
-                        "game_level",
-                    ]
-                )
+        append_statistics_row(
+            csv_file_path,
+            [
+                duration,
+                self.num_of_created_nodes,
+                self.visited_count(),
+                self.solution.path_cost,
+                game_level,
+            ],
+        )
+
+    @instrumented
+    def dfs(self, start_node: Node) -> None:
+        # Explicit stack instead of recursion: no depth limit from Python's
+        # recursion limit, and every node is expanded exactly once. Children
+        # are pushed in reverse so they are visited in the recursive order.
+        stats = self.stats
+        stack = self.take_restored()
+        if stack is None:
+            stack = [start_node]
+        self.frontier = stack
+
+        while stack:
+            node = stack.pop()
 
-            # Write the data
-            writer.writerow(
-                [
-                    duration,
-                    self.num_of_created_nodes,
-                    self.num_of_visited_nodes,
-                    self.solution.path_cost,
-                    game_level,
-                ]
-            )
+            if node.state.phase == GamePhase.WON:
+                self.solution = node
+                return
 
-    def dfs(self, node: Node) -> None:
-        if node.state.phase == GamePhase.WON:
-            self.solution = node
-            return
+            if node.state.phase == GamePhase.LOST:
+                continue
 
-        if node.state.phase == GamePhase.LOST:
-            return
+            state_key = self.state_key(node.state)
+            if state_key in self.visited:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
 
-        hashed_state = hash(node.state)
-        if hashed_state in self.visited:
-            return
+            self.visited.add(state_key)
+
+            children = node.expand(self.successors)
+            self.num_of_created_nodes += len(children)
+            children.reverse()
+            stack.extend(children)
+            if stats is not None:
+                stats.expansion(len(children), len(stack), len(self.visited))
+
+    @instrumented
+    def iddfs(self, start_node: Node, max_depth: int | None = None) -> None:
+        """Iterative-deepening DFS; the first solution found is a shortest one.
+
+        ``self.dis`` is the transposition table of the current iteration: the
+        shallowest depth each state was reached at. A state reached again no
+        deeper than before has already been searched with at least as much
+        remaining depth and is skipped.
+        """
+        stats = self.stats
+        depth_limit = 0
+
+        while max_depth is None or depth_limit <= max_depth:
+            self.dis = {}
+            stack = [start_node]
+            cutoff = False
+
+            while stack:
+                node = stack.pop()
+
+                if node.state.phase == GamePhase.WON:
+                    self.solution = node
+                    return
 
-        self.visited.add(hashed_state)
-        self.num_of_created_nodes += len(node.expand(self.problem))
+                if node.state.phase == GamePhase.LOST:
+                    continue
 
-        for child in node.expand(self.problem):
-            self.dfs(child)
-            if self.solution:
-                break
-            del child
+                state_key = self.state_key(node.state)
+                depth = self.dis.get(state_key)
+                if depth is not None and depth <= node.path_cost:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
 
+                self.dis[state_key] = node.path_cost
+
+                if node.path_cost >= depth_limit:
+                    cutoff = True
+                    continue
+
+                children = node.expand(self.successors)
+                self.num_of_created_nodes += len(children)
+                children.reverse()
+                stack.extend(children)
+                if stats is not None:
+                    stats.expansion(len(children), len(stack), len(self.dis))
+
+            # Nothing was cut off by the limit: the whole space has been seen.
+            if not cutoff:
+                return
+
+            depth_limit += 1
+
+    @instrumented
     def bfs(self, start_node: Node) -> None:
-        frontier = deque([start_node])
+        stats = self.stats
+        frontier = self.take_restored()
+        if frontier is None:
+            frontier = deque([start_node])
+        self.frontier = frontier
 
         while frontier:
             node = frontier.pop()
@@ -101,28 +381,250 @@ class SearchAlgorithm:
             if node.state.phase == GamePhase.LOST:
                 continue
 
-            hashed_state = hash(node.state)
-            if hashed_state in self.visited:
+            state_key = self.state_key(node.state)
+            if state_key in self.visited:
+                if stats is not None:
+                    stats.duplicates += 1
                 continue
 
-            self.visited.add(hashed_state)
+            self.visited.add(state_key)
 
-            for child in node.expand(self.problem):
+            if self.is_dominated(node, node.path_cost):
+                continue
+
+            children = node.expand(self.successors)
+            for child in children:
                 frontier.appendleft(child)
                 self.num_of_created_nodes += 1
+            if stats is not None:
+                stats.expansion(len(children), len(frontier), len(self.visited))
 
         return
 
-    def ucs(self, start_node: Node) -> None:
-        frontier = PriorityQueue([])
+    def require_packed_options(self, mode: str) -> None:
+        """The packed BFS modes store exact state keys and prune nothing;
+        refuse the options they would otherwise ignore."""
+        if self.key_mode != "exact":
+            raise ValueError(f"{mode} only supports the exact state key mode, not {self.key_mode}")
+        if self.dominance is not None:
+            raise ValueError(f"{mode} does not support dominance pruning")
+
+    @instrumented
+    def bfs_compact(self, start_node: Node) -> None:
+        """BFS over packed states instead of live Node/GameState objects.
+
+        The arena holds every state's ``state_key()`` with its parent index
+        and action, in the order states are discovered, so the frontier is
+        just the entries past ``head``. States are deduplicated by the arena
+        when they are generated and rebuilt by the codec only to be
+        expanded; Nodes are made for the solution path alone.
+
+        Unlike ``bfs``, which tests a node for the goal when it is popped,
+        children are tested when generated: the solution is just as short,
+        but the search stops without expanding the rest of the layer before
+        it, so it reports fewer created nodes.
+        """
+        self.require_packed_options("bfs_compact")
+        start_state = start_node.state
+        if start_state.phase == GamePhase.WON:
+            self.solution = start_node
+            return
+        if start_state.phase == GamePhase.LOST:
+            return
+
+        # Keys are taken from decoded states throughout, so every state in
+        # the arena went through the same encoding.
+        codec = StateCodec(start_state)
+        restored = self.take_restored()
+        if restored is not None:
+            self.arena, head = restored
+            arena = self.arena
+        else:
+            start_state = codec.decode(codec.encode(start_state))
+            self.arena = arena = StateArena()
+            arena.add(codec.encode(start_state))
+            head = 0
+        stats = self.stats
+
+        while head < len(arena):
+            index = head
+            head += 1
+            state = codec.decode(arena.key(index))
+            generated = 0
+
+            for action, child, phase in self.successors(state):
+                self.num_of_created_nodes += 1
+                generated += 1
+                if phase == GamePhase.LOST:
+                    continue
+
+                child_index = arena.add(codec.encode(child), index, action.direction)
+                if child_index is None:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                if phase == GamePhase.WON:
+                    self.solution = self.arena_node(codec, start_node, child_index)
+                    if stats is not None:
+                        stats.expansion(generated, len(arena) - head, len(arena))
+                    return
+
+            self.arena_head = head
+            if stats is not None:
+                stats.expansion(generated, len(arena) - head, len(arena))
+
+    def arena_node(self, codec: StateCodec, root: Node, index: int) -> Node:
+        """Rebuild the Node chain from ``root`` to arena entry ``index``."""
+        node = root
+        for step in self.arena.path(index)[1:]:
+            state = codec.decode(self.arena.key(step), node.path_cost + 1)
+            action = MOVE_ACTIONS[self.arena.direction(step)]
+            node = Node(state, node, action, node.path_cost + 1)
+        return node
+
+    @instrumented
+    def bfs_external(
+        self,
+        start_node: Node,
+        memory_limit: int = EXTERNAL_BFS_MEMORY_LIMIT,
+        work_dir: str = EXTERNAL_BFS_DIR,
+        dedup_layers: int | None = EXTERNAL_BFS_DEDUP_LAYERS,
+    ) -> None:
+        """Layered BFS whose layers live on disk as sorted fixed-width records.
+
+        Only the candidates of the layer being built are held in memory, up
+        to ``memory_limit`` bytes before they are spilled; see ``LayerStore``.
+        No parents are stored: once a winning state is generated, its path is
+        recovered by scanning each earlier layer for a state that leads to it.
+        """
+        self.require_packed_options("bfs_external")
+        start_state = start_node.state
+        if start_state.phase == GamePhase.WON:
+            self.solution = start_node
+            return
+        if start_state.phase == GamePhase.LOST:
+            return
+
+        codec = StateCodec(start_state)
+        start_state = codec.decode(codec.encode(start_state))
+        layers = LayerStore(work_dir, codec.key_width, memory_limit, dedup_layers)
+        self.layers = layers
+
+        try:
+            layers.add(codec.encode_fixed(start_state))
+            layers.finish_layer()
+            depth = 0
+            goal = None
+            stats = self.stats
+
+            while goal is None and layers.sizes[depth]:
+                candidates = 0
+                for record in layers.read(depth):
+                    generated = 0
+                    for _, child, phase in self.successors(codec.decode(record)):
+                        self.num_of_created_nodes += 1
+                        generated += 1
+                        if phase == GamePhase.LOST:
+                            continue
+                        if phase == GamePhase.WON:
+                            goal = codec.encode_fixed(child)
+                            break
+                        layers.add(codec.encode_fixed(child))
+                        candidates += 1
+                    if stats is not None:
+                        stats.expansion(generated, layers.sizes[depth], sum(layers.sizes))
+                    if goal is not None:
+                        break
+                size = layers.finish_layer()
+                if stats is not None:
+                    # Candidates the merge dropped as already in a layer.
+                    stats.duplicates += candidates - size
+                depth += 1
+
+            if goal is not None:
+                self.solution = self.layered_path(codec, start_node, goal, depth)
+        finally:
+            layers.close()
+
+    def layered_path(self, codec: StateCodec, root: Node, goal: bytes, depth: int) -> Node:
+        """Walk back from ``goal`` through layers ``depth - 1`` .. 0, then
+        rebuild the Node chain from ``root``."""
+        steps = []
+        target = goal
+        for previous in range(depth - 1, -1, -1):
+            for record in self.layers.read(previous):
+                state = codec.decode(record)
+                action = next(
+                    (
+                        action
+                        for action, child, _ in self.successors(state)
+                        if codec.encode_fixed(child) == target
+                    ),
+                    None,
+                )
+                if action is not None:
+                    steps.append((action, target))
+                    target = record
+                    break
+
+        steps.reverse()
+        return self.decoded_path(codec, root, steps)
+
+    def decoded_path(self, codec: StateCodec, root: Node, steps) -> Node:
+        """Node chain from ``root`` through ``(action, encoded state)`` steps."""
+        node = root
+        for action, record in steps:
+            state = codec.decode(record, node.path_cost + 1)
+            node = Node(state, node, action, node.path_cost + 1)
+        return node
+
+    @instrumented
+    def bfs_parallel(self, start_node: Node, workers: int = DEFAULT_BFS_WORKERS) -> None:
+        """Layer-synchronous BFS over ``workers`` processes, experimental;
+        see ``ParallelBFS``."""
+        self.require_packed_options("bfs_parallel")
+        start_state = start_node.state
+        if start_state.phase == GamePhase.WON:
+            self.solution = start_node
+            return
+        if start_state.phase == GamePhase.LOST:
+            return
+
+        # The workers expand states out of process, so counters arrive and
+        # budgets are checked once per layer.
+        on_layer = None if self.stats is None else self.stats.expansion
+        self.parallel = search = ParallelBFS(self.problem, start_state, workers)
+        try:
+            steps = search.run(on_layer)
+        finally:
+            search.close()
+            self.num_of_created_nodes += search.num_of_created_nodes
 
-        hashed_start_state = hash(start_node.state)
-        frontier.add((start_node.ucs_cost(), hashed_start_state, start_node))
+        if steps is not None:
+            self.solution = self.decoded_path(search.codec, start_node, steps)
 
-        self.dis[hashed_start_state] = start_node.ucs_cost()
+    @instrumented
+    def ucs(self, start_node: Node) -> None:
+        # Entries are (cost, state_key, node); a popped entry is stale when its
+        # state is already closed or a cheaper entry has been pushed since.
+        stats = self.stats
+        frontier = self.take_restored()
+        if frontier is None:
+            frontier = BucketQueue()
+            start_key = self.state_key(start_node.state)
+            start_cost = start_node.ucs_cost()
+            frontier.add(start_cost, (start_cost, start_key, start_node))
+            self.dis[start_key] = start_cost
+        self.frontier = frontier
 
         while frontier:
-            cost, hashed_state, node = frontier.pop()
+            _, (cost, state_key, node) = frontier.pop()
+
+            if state_key in self.visited or cost > self.dis[state_key]:
+                self.num_of_stale_pops += 1
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
 
             if node.state.phase == GamePhase.LOST:
                 continue
@@ -131,22 +633,39 @@ class SearchAlgorithm:
                 self.solution = node
                 return
 
+            self.visited.add(state_key)
+
+            if self.is_dominated(node, cost):
+                continue
+
             self.num_of_created_nodes += 1
 
-            for child in node.expand(self.problem):
-                hashed_child_state = hash(child.state)
+            children = node.expand(self.successors)
+            for child in children:
+                child_key = self.state_key(child.state)
+                if child_key in self.visited:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
 
-                child_cost = child.ucs_cost()
+                child_cost = cost + child.ucs_cost()
 
                 if (
-                    hashed_child_state not in self.dis.keys()
-                    or self.dis[hashed_child_state] > cost + child_cost
+                    child_key not in self.dis
+                    or self.dis[child_key] > child_cost
                 ):
-                    self.dis[hashed_child_state] = cost + child_cost
-                    frontier.add((cost + child_cost, hashed_child_state, child))
-
-    def hill_climbing_backtrack(self, start_node: Node) -> None:
-        hashed_start_state = hash(start_node.state)
+                    self.dis[child_key] = child_cost
+                    frontier.add(child_cost, (child_cost, child_key, child))
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.expansion(len(children), len(frontier), len(self.visited))
+
+    @instrumented
+    def hill_climbing_backtrack(
+        self, start_node: Node, heuristic: str = DEFAULT_HEURISTIC
+    ) -> None:
+        start_key = self.state_key(start_node.state)
 
         if start_node.state.phase == GamePhase.LOST:
             return
@@ -155,46 +674,70 @@ class SearchAlgorithm:
             self.solution = start_node
             return
 
-        self.visited.add(hashed_start_state)
+        self.visited.add(start_key)
 
         frontier = PriorityQueue([])
 
-        goal_list = start_node.state.board.get_entities_by_type(EntityType.GOAL)
-        if len(goal_list) <= 0:
+        goal_position = start_node.state.board.goal_position()
+        if goal_position is None:
             return
 
-        for child in start_node.expand(self.problem):
-            hashed_child_state = hash(child.state)
+        estimate = self.goal_heuristic(heuristic, goal_position)
+        stats = self.stats
+
+        children = start_node.expand(self.successors)
+        for child in children:
+            child_key = self.state_key(child.state)
             if child.state.get_player() is None:
                 continue
-            self.dis[hashed_child_state] = child.distance_to_the_goal(
-                goal_list[0].position.to_tuple()
-            )
-            frontier.add((self.dis[hashed_child_state], hashed_child_state, child))
+            distance = estimate(child)
+            if distance is None:
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            self.dis[child_key] = distance
+            frontier.add((self.dis[child_key], child_key, child))
+        if stats is not None:
+            stats.expansion(len(children), len(frontier), len(self.visited))
 
         while frontier:
-            cost, hashed_state, node = frontier.pop()
+            cost, state_key, node = frontier.pop()
 
             self.num_of_created_nodes += 1
-            if hashed_state not in self.visited:
-                self.hill_climbing_backtrack(node)
+            if state_key not in self.visited:
+                self.hill_climbing_backtrack(node, heuristic)
                 if self.solution is not None:
                     return
-
-    def a_star(self, start_node: Node) -> None:
-        frontier = PriorityQueue([])
-
-        hashed_start_state = hash(start_node.state)
-        frontier.add((0, hashed_start_state, start_node))
-
-        self.dis[hashed_start_state] = 0
-
-        goal_list = start_node.state.board.get_entities_by_type(EntityType.GOAL)
-        if len(goal_list) <= 0:
+            elif stats is not None:
+                stats.duplicates += 1
+
+    @instrumented
+    def a_star(self, start_node: Node, heuristic: str = DEFAULT_HEURISTIC) -> None:
+        # Queued by f = g + h with ties going to the deeper node; self.dis
+        # holds the best g per state and stale entries are skipped on pop.
+        stats = self.stats
+        frontier = self.take_restored()
+        if frontier is None:
+            frontier = BucketQueue()
+            start_key = self.state_key(start_node.state)
+            frontier.add(0, (0, start_key, start_node))
+            self.dis[start_key] = 0
+        self.frontier = frontier
+
+        goal_position = start_node.state.board.goal_position()
+        if goal_position is None:
             return
 
+        estimate = self.goal_heuristic(heuristic, goal_position)
+
         while frontier:
-            cost, hashed_state, node = frontier.pop()
+            _, (cost, state_key, node) = frontier.pop()
+
+            if state_key in self.visited or cost > self.dis[state_key]:
+                self.num_of_stale_pops += 1
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
 
             if node.state.phase == GamePhase.LOST:
                 continue
@@ -203,23 +746,35 @@ class SearchAlgorithm:
                 self.solution = node
                 return
 
+            self.visited.add(state_key)
+
+            if self.is_dominated(node, cost):
+                continue
+
             self.num_of_created_nodes += 1
 
             cost += 1
 
-            for child in node.expand(self.problem):
-                hashed_child_state = hash(child.state)
-
+            children = node.expand(self.successors)
+            for child in children:
                 if child.state.get_player() is None:
                     continue
 
-                child_cost = child.distance_to_the_goal(
-                    goal_list[0].position.to_tuple()
-                )
+                child_key = self.state_key(child.state)
+                if child_key in self.visited:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
 
-                if (
-                    hashed_child_state not in self.dis.keys()
-                    or self.dis[hashed_child_state] > cost + child_cost
-                ):
-                    self.dis[hashed_child_state] = cost + child_cost
-                    frontier.add((cost + child_cost, hashed_child_state, child))
\ No newline at end of file
+                if child_key not in self.dis or self.dis[child_key] > cost:
+                    distance = estimate(child)
+                    if distance is None:
+                        if stats is not None:
+                            stats.pruned += 1
+                        continue
+                    self.dis[child_key] = cost
+                    frontier.add(cost + distance, (cost, child_key, child), tie=-cost)
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.expansion(len(children), len(frontier), len(self.visited))
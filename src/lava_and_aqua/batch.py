@@ -0,0 +1,291 @@
+"""Solve levels headlessly, every (level, algorithm) pair in a process pool.
+Run from the repository root:
+
+    uv run src/lava_and_aqua/batch.py --levels "levels/level_*.json" bfs a_star
+    uv run src/lava_and_aqua/batch.py --csv results.csv --jsonl results.jsonl --time-limit 60
+    uv run src/lava_and_aqua/batch.py --statistics dfs bfs ucs hill_climbing_backtrack a_star
+
+Each job runs in its own process, killed when it passes ``--time-limit``
+and capped to ``--memory-limit`` MiB of address space. A row is written as
+soon as its job ends, whatever the order the jobs were started in.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+
+from ai.heuristics import HEURISTICS
+from ai.node import Node
+from ai.problem import LavaAndAquaProblem
+from ai.search import STATE_KEY_MODES, SearchAlgorithm, append_statistics_row
+from core.engine import BOARD_BACKENDS
+from core.observer import Observer
+from core.state import GameState
+from utils.constants import (
+    DEFAULT_BATCH_JOBS,
+    DEFAULT_BATCH_MEMORY_LIMIT,
+    DEFAULT_BATCH_TIME_LIMIT,
+    DEFAULT_BOARD_BACKEND,
+    DEFAULT_DOMINANCE,
+    DEFAULT_HEURISTIC,
+    DEFAULT_LAVA_PRUNING,
+    DEFAULT_SPREAD_MODE,
+    DEFAULT_STATE_KEY_MODE,
+)
+from utils.level_loader import LevelLoader
+
+
+# Search method -> name used by main.py and the statistics/ tables.
+ALGORITHMS = {
+    "dfs": "DFS",
+    "iddfs": "IDDFS",
+    "bfs": "BFS",
+    "bfs_compact": "BFS",
+    "bfs_external": "BFS",
+    "ucs": "UCS",
+    "hill_climbing_backtrack": "Hill Climbing Backtrack",
+    "a_star": "A*",
+}
+
+INFORMED_ALGORITHMS = ("hill_climbing_backtrack", "a_star")
+
+FIELDS = [
+    "level",
+    "algorithm",
+    "status",
+    "moves",
+    "duration",
+    "created_nodes",
+    "visited_nodes",
+    "peak_rss_mib",
+    "error",
+]
+
+# How often the pool checks for jobs past their time limit.
+POLL_SECONDS = 0.2
+
+
+def out_of_memory(error: BaseException | None) -> bool:
+    """True if ``error`` is a MemoryError or was raised while handling one;
+    C code hitting the limit can surface it as a SystemError."""
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _solve(level_path: str, algorithm: str, args: argparse.Namespace, results: Connection) -> None:
+    Observer.spread_mode = args.spread
+    # Only the soft limit is lowered, so it can be lifted again to report.
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if args.memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (args.memory_limit * 2**20, hard))
+
+    row = {"level": Path(level_path).stem, "algorithm": algorithm}
+    try:
+        initial_state = GameState.from_level_data(LevelLoader.load_level(level_path), args.board)
+        problem = LavaAndAquaProblem(initial_state, args.lava_pruning)
+        search = SearchAlgorithm(problem, args.state_key, args.dominance)
+        arguments = {"heuristic": args.heuristic} if algorithm in INFORMED_ALGORITHMS else {}
+
+        search.start_time = time.perf_counter()
+        getattr(search, algorithm)(Node(initial_state), **arguments)
+        search.end_time = time.perf_counter()
+
+        row["status"] = "solved" if search.solution is not None else "unsolved"
+        row["moves"] = search.solution.path_cost if search.solution is not None else None
+        row["duration"] = search.end_time - search.start_time
+        row["created_nodes"] = search.num_of_created_nodes
+        row["visited_nodes"] = search.visited_count()
+    except Exception as error:
+        if out_of_memory(error):
+            row["status"] = "memory"
+        else:
+            row["status"] = "error"
+            row["error"] = f"{type(error).__name__}: {error}"
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    # ru_maxrss is in KiB on Linux.
+    row["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.send(row)
+    results.close()
+
+
+class ResultWriter:
+    """Streams finished rows to stdout and the optional CSV, JSONL and
+    ``statistics/`` outputs, flushing after every row."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.statistics = args.statistics
+        self.files = []
+        self.csv = None
+        self.jsonl = None
+        if args.csv:
+            file = open(args.csv, "w", newline="")
+            self.files.append(file)
+            self.csv = csv.DictWriter(file, FIELDS)
+            self.csv.writeheader()
+        if args.jsonl:
+            self.jsonl = open(args.jsonl, "w")
+            self.files.append(self.jsonl)
+        print(f"{'level':<12} {'algorithm':<24} {'status':<9} {'moves':>6} {'seconds':>9} {'created':>9}")
+
+    def write(self, row: dict) -> None:
+        row = {field: row.get(field) for field in FIELDS}
+        duration = "-" if row["duration"] is None else f"{row['duration']:.2f}"
+        print(
+            f"{row['level']:<12} {row['algorithm']:<24} {row['status']:<9} "
+            f"{row['moves'] if row['moves'] is not None else '-':>6} {duration:>9} "
+            f"{row['created_nodes'] if row['created_nodes'] is not None else '-':>9}",
+            flush=True,
+        )
+        if self.csv is not None:
+            self.csv.writerow(row)
+        if self.jsonl is not None:
+            self.jsonl.write(json.dumps(row) + "\n")
+        for file in self.files:
+            file.flush()
+
+        if self.statistics and row["status"] == "solved":
+            append_statistics_row(
+                f"statistics/{ALGORITHMS[row['algorithm']]}.csv",
+                [row["duration"], row["created_nodes"], row["visited_nodes"], row["moves"], row["level"]],
+            )
+
+    def close(self) -> None:
+        for file in self.files:
+            file.close()
+
+
+def run_batch(jobs: list[tuple[str, str]], args: argparse.Namespace, writer: ResultWriter) -> int:
+    """Run ``jobs`` with at most ``args.jobs`` at a time; return how many
+    ended in an error.
+
+    Every job reports its row over a pipe of its own, so terminating a job
+    mid-write can only break that job's pipe, which is dropped with it.
+    """
+    context = multiprocessing.get_context()
+    pending = list(enumerate(jobs))
+    pending.reverse()
+    # job index -> (process, receiving end of its pipe, start time)
+    running: dict[int, tuple[multiprocessing.Process, Connection, float]] = {}
+    errors = 0
+
+    def finish(index: int, row: dict) -> None:
+        nonlocal errors
+        job = running.pop(index, None)
+        if job is None:
+            # Already finished, e.g. timed out just as its row arrived.
+            return
+        process, connection, _ = job
+        connection.close()
+        process.join()
+        errors += row["status"] == "error"
+        writer.write(row)
+
+    def job_row(index: int) -> dict:
+        level_path, algorithm = jobs[index]
+        return {"level": Path(level_path).stem, "algorithm": algorithm}
+
+    try:
+        while pending or running:
+            while pending and len(running) < args.jobs:
+                index, (level_path, algorithm) = pending.pop()
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_solve, args=(level_path, algorithm, args, sender), daemon=True
+                )
+                process.start()
+                # Only the child holds the sending end now, so its exit
+                # shows up as end-of-file.
+                sender.close()
+                running[index] = (process, receiver, time.monotonic())
+
+            readers = {connection: index for index, (_, connection, _) in running.items()}
+            for connection in wait(list(readers), timeout=POLL_SECONDS):
+                index = readers[connection]
+                try:
+                    row = connection.recv()
+                except EOFError:
+                    process = running[index][0]
+                    process.join()
+                    row = {**job_row(index), "status": "error", "error": f"exit code {process.exitcode}"}
+                finish(index, row)
+
+            now = time.monotonic()
+            for index, (process, _, started) in list(running.items()):
+                if args.time_limit is not None and now - started > args.time_limit:
+                    process.terminate()
+                    finish(index, {**job_row(index), "status": "timeout", "duration": now - started})
+    finally:
+        for process, connection, _ in running.values():
+            process.terminate()
+            process.join()
+            connection.close()
+
+    return errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless batch solver")
+    parser.add_argument("--levels", default="levels/level_*.json", help="glob of level files")
+    parser.add_argument(
+        "algorithms",
+        nargs="*",
+        default=["dfs", "bfs", "ucs", "hill_climbing_backtrack", "a_star"],
+        help=f"any of {', '.join(ALGORITHMS)}",
+    )
+    parser.add_argument("--jobs", type=int, default=DEFAULT_BATCH_JOBS, help="concurrent jobs")
+    parser.add_argument(
+        "--time-limit", type=float, default=DEFAULT_BATCH_TIME_LIMIT, help="seconds per job"
+    )
+    parser.add_argument(
+        "--memory-limit", type=int, default=DEFAULT_BATCH_MEMORY_LIMIT, help="MiB of address space per job"
+    )
+    parser.add_argument("--csv", help="write one row per job to this CSV file")
+    parser.add_argument("--jsonl", help="write one JSON object per job to this file")
+    parser.add_argument(
+        "--statistics",
+        action="store_true",
+        help="also append solved jobs to statistics/<algorithm>.csv",
+    )
+    parser.add_argument("--board", choices=sorted(BOARD_BACKENDS), default=DEFAULT_BOARD_BACKEND)
+    parser.add_argument("--spread", choices=["loop", "numpy"], default=DEFAULT_SPREAD_MODE)
+    parser.add_argument("--state-key", choices=STATE_KEY_MODES, default=DEFAULT_STATE_KEY_MODE)
+    parser.add_argument("--heuristic", choices=HEURISTICS, default=DEFAULT_HEURISTIC)
+    parser.add_argument("--dominance", action=argparse.BooleanOptionalAction, default=DEFAULT_DOMINANCE)
+    parser.add_argument(
+        "--lava-pruning", action=argparse.BooleanOptionalAction, default=DEFAULT_LAVA_PRUNING
+    )
+    args = parser.parse_args()
+
+    unknown = set(args.algorithms) - set(ALGORITHMS)
+    if unknown:
+        parser.error(f"unknown algorithms: {', '.join(sorted(unknown))}")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    levels = sorted(glob.glob(args.levels))
+    if not levels:
+        print(f"No level files match {args.levels}", file=sys.stderr)
+        return 1
+    jobs = [(level_path, algorithm) for level_path in levels for algorithm in args.algorithms]
+
+    writer = ResultWriter(args)
+    try:
+        errors = run_batch(jobs, args, writer)
+    finally:
+        writer.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,522 @@
+"""Benchmarks for the search algorithms. Run from the repository root:
+
+    uv run src/lava_and_aqua/benchmark.py heuristics --levels "levels/level_*.json"
+    uv run src/lava_and_aqua/benchmark.py frontier --levels "levels/level_5.json"
+    uv run src/lava_and_aqua/benchmark.py parallel --levels "levels/level_[79].json" --workers 1,2,4
+    uv run src/lava_and_aqua/benchmark.py solve --update-baseline
+    uv run src/lava_and_aqua/benchmark.py solve --threshold 0.2 bfs a_star
+    uv run src/lava_and_aqua/benchmark.py micro --levels "levels/level_[579].json"
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+from ai.heuristics import HEURISTICS
+from ai.node import Node
+from ai.problem import LavaAndAquaProblem
+from ai.search import STATE_KEY_MODES, SearchAlgorithm
+from batch import ALGORITHMS, run_batch
+from core.engine import BOARD_BACKENDS, GameEngine
+from core.observer import Observer
+from core.state import GameState
+from utils.constants import (
+    BENCHMARK_BASELINE_PATH,
+    DEFAULT_BATCH_MEMORY_LIMIT,
+    DEFAULT_BATCH_TIME_LIMIT,
+    DEFAULT_BENCHMARK_REPEATS,
+    DEFAULT_BOARD_BACKEND,
+    DEFAULT_DOMINANCE,
+    DEFAULT_HEURISTIC,
+    DEFAULT_LAVA_PRUNING,
+    DEFAULT_REGRESSION_THRESHOLD,
+    DEFAULT_SPREAD_MODE,
+    DEFAULT_STATE_KEY_MODE,
+)
+from utils.level_loader import LevelLoader
+from utils.types import GamePhase
+
+
+INFORMED_ALGORITHMS = ("a_star", "hill_climbing_backtrack")
+
+
+def level_paths(pattern: str) -> list[Path]:
+    return sorted(Path(path) for path in glob.glob(pattern))
+
+
+def run_heuristics(args: argparse.Namespace) -> int:
+    """Compare the heuristics on each level: build time, nodes and nodes saved."""
+    print(
+        f"{'level':<12} {'heuristic':<15} {'build s':>8} {'search s':>9} "
+        f"{'nodes':>9} {'saved':>9} {'moves':>6}"
+    )
+    for level_path in level_paths(args.levels):
+        level_data = LevelLoader.load_level(level_path)
+        baseline = None
+
+        for heuristic in args.heuristics:
+            initial_state = GameState.from_level_data(level_data)
+            problem = LavaAndAquaProblem(initial_state)
+            search = SearchAlgorithm(problem)
+
+            build = f"{0.0:.3f}"
+            if heuristic == "pattern_db":
+                database = problem.pattern_database()
+                build = "cached" if database.loaded_from_cache else f"{database.build_seconds:.3f}"
+
+            started = time.perf_counter()
+            getattr(search, args.algorithm)(Node(initial_state), heuristic=heuristic)
+            search_seconds = time.perf_counter() - started
+
+            nodes = search.num_of_created_nodes
+            if baseline is None:
+                baseline = nodes
+            moves = search.solution.path_cost if search.solution is not None else "-"
+            print(
+                f"{level_path.stem:<12} {heuristic:<15} {build:>8} "
+                f"{search_seconds:>9.2f} {nodes:>9} {baseline - nodes:>9} {moves:>6}"
+            )
+
+    return 0
+
+
+def run_frontier(args: argparse.Namespace) -> int:
+    """Peak traced memory per stored state of BFS against compact BFS."""
+    print(
+        f"{'level':<12} {'mode':<12} {'search s':>9} {'states':>9} "
+        f"{'peak MiB':>9} {'bytes/state':>12} {'arena B/state':>14}"
+    )
+    for level_path in level_paths(args.levels):
+        level_data = LevelLoader.load_level(level_path)
+
+        for mode in ("bfs", "bfs_compact"):
+            initial_state = GameState.from_level_data(level_data)
+            search = SearchAlgorithm(LavaAndAquaProblem(initial_state), args.state_key)
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            getattr(search, mode)(Node(initial_state))
+            search_seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            states = search.visited_count()
+            arena = "-"
+            if search.arena is not None:
+                arena = f"{search.arena.nbytes() / len(search.arena):.1f}"
+            print(
+                f"{level_path.stem:<12} {mode:<12} {search_seconds:>9.2f} {states:>9} "
+                f"{peak / 2**20:>9.1f} {peak / states:>12.0f} {arena:>14}"
+            )
+
+    return 0
+
+
+def run_parallel(args: argparse.Namespace) -> int:
+    """Wall time and speedup of the parallel BFS from 1 to N workers."""
+    cores = os.cpu_count() or 1
+    if cores < max(args.workers):
+        print(f"Only {cores} CPU(s) for up to {max(args.workers)} workers: speedups are not meaningful.")
+    print(f"{'level':<12} {'workers':>7} {'search s':>9} {'speedup':>8} {'states':>9} {'moves':>6}")
+    for level_path in level_paths(args.levels):
+        level_data = LevelLoader.load_level(level_path)
+        single = None
+
+        for workers in args.workers:
+            initial_state = GameState.from_level_data(level_data)
+            search = SearchAlgorithm(LavaAndAquaProblem(initial_state))
+
+            started = time.perf_counter()
+            search.bfs_parallel(Node(initial_state), workers)
+            search_seconds = time.perf_counter() - started
+
+            if single is None:
+                single = search_seconds
+            moves = search.solution.path_cost if search.solution is not None else "-"
+            print(
+                f"{level_path.stem:<12} {workers:>7} {search_seconds:>9.2f} "
+                f"{single / search_seconds:>7.2f}x {search.parallel.num_of_visited_states:>9} {moves:>6}"
+            )
+
+    return 0
+
+
+# Metrics compared against the baseline; a run regresses when one of them
+# grows by more than the threshold.
+COMPARED_METRICS = ("duration", "created_nodes", "visited_nodes", "peak_rss_mib")
+
+# Medians below this many seconds are too noisy to gate on.
+MIN_COMPARED_SECONDS = 0.1
+
+# Outcomes whose run is not repeated: it would only hit the same limit again.
+FAILED_STATUSES = ("timeout", "memory", "error")
+
+
+class RunCollector:
+    """Keeps the rows ``run_batch`` reports, printing one line per run."""
+
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+
+    def write(self, row: dict) -> None:
+        self.rows.append(row)
+        duration = "-" if row.get("duration") is None else f"{row['duration']:.2f}s"
+        print(f"  {row['level']:<12} {row['algorithm']:<24} {row['status']:<9} {duration}", flush=True)
+
+
+def summarize(rows: list[dict]) -> dict[str, dict]:
+    """One entry per ``level/algorithm``: median duration over the runs,
+    the highest peak RSS, and the search counters of the first run (they do
+    not change between runs)."""
+    runs: dict[str, list[dict]] = {}
+    for row in rows:
+        runs.setdefault(f"{row['level']}/{row['algorithm']}", []).append(row)
+
+    summary = {}
+    for name, results in sorted(runs.items()):
+        first = results[0]
+        durations = [row["duration"] for row in results if row.get("duration") is not None]
+        memory = [row["peak_rss_mib"] for row in results if row.get("peak_rss_mib") is not None]
+        summary[name] = {
+            "status": first["status"],
+            "moves": first.get("moves"),
+            "runs": len(results),
+            "duration": statistics.median(durations) if durations else None,
+            "duration_min": min(durations) if durations else None,
+            "created_nodes": first.get("created_nodes"),
+            "visited_nodes": first.get("visited_nodes"),
+            "peak_rss_mib": max(memory) if memory else None,
+        }
+    return summary
+
+
+def regressions(summary: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Describe every way ``summary`` is worse than ``baseline``."""
+    found = []
+    for name, current in summary.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if previous["status"] == "solved" and current["status"] != "solved":
+            found.append(f"{name}: {current['status']} (was solved)")
+            continue
+        if current["status"] != "solved":
+            continue
+        if previous.get("moves") is not None and current["moves"] > previous["moves"]:
+            found.append(f"{name}: {current['moves']} moves (was {previous['moves']})")
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            if metric == "duration" and before < MIN_COMPARED_SECONDS:
+                continue
+            change = after / before - 1
+            if change > threshold:
+                found.append(f"{name}: {metric} {after:.6g} (was {before:.6g}, +{change:.0%})")
+    return found
+
+
+def run_solve(args: argparse.Namespace) -> int:
+    """Every algorithm on every level, compared against the stored baseline."""
+    levels = [str(path) for path in level_paths(args.levels)]
+    jobs = [(level, algorithm) for level in levels for algorithm in args.algorithms]
+    # Runs are sequential by default so they do not compete for the CPU.
+    args.jobs = args.parallel_jobs
+
+    collector = RunCollector()
+    for repeat in range(args.repeats):
+        print(f"run {repeat + 1}/{args.repeats}")
+        run_batch(jobs, args, collector)
+        failed = {
+            (row["level"], row["algorithm"])
+            for row in collector.rows
+            if row["status"] in FAILED_STATUSES
+        }
+        jobs = [job for job in jobs if (Path(job[0]).stem, job[1]) not in failed]
+
+    summary = summarize(collector.rows)
+    print(
+        f"\n{'level/algorithm':<36} {'status':<9} {'moves':>6} {'median s':>9} "
+        f"{'created':>9} {'visited':>9} {'peak MiB':>9}"
+    )
+    for name, result in summary.items():
+        values = [
+            "-" if result[metric] is None else format(result[metric], spec)
+            for metric, spec in (
+                ("moves", ""),
+                ("duration", ".3f"),
+                ("created_nodes", ""),
+                ("visited_nodes", ""),
+                ("peak_rss_mib", ".1f"),
+            )
+        ]
+        print(
+            f"{name:<36} {result['status']:<9} {values[0]:>6} {values[1]:>9} "
+            f"{values[2]:>9} {values[3]:>9} {values[4]:>9}"
+        )
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        stored = {}
+        if baseline_path.exists():
+            stored = json.loads(baseline_path.read_text())["results"]
+        stored.update(summary)
+        document = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeats": args.repeats,
+            "results": stored,
+        }
+        baseline_path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; run with --update-baseline to store one.")
+        return 0
+
+    found = regressions(summary, json.loads(baseline_path.read_text())["results"], args.threshold)
+    if not found:
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {baseline_path}")
+        return 0
+    print(f"\nRegressions beyond {args.threshold:.0%} against {baseline_path}:")
+    for line in found:
+        print(f"  {line}")
+    return 1
+
+
+def sample_states(problem: LavaAndAquaProblem, initial_state: GameState, count: int, budget: int) -> list[GameState]:
+    """``count`` states with a legal move, spread evenly over the first
+    ``budget`` such states a BFS from ``initial_state`` reaches."""
+    seen = {initial_state.state_key()}
+    reached = [initial_state] if initial_state.get_available_actions() else []
+    queue = deque([initial_state])
+    while queue and len(reached) < budget:
+        for _, child, phase in problem.successors(queue.popleft()):
+            if phase != GamePhase.PLAYING or child.state_key() in seen:
+                continue
+            seen.add(child.state_key())
+            queue.append(child)
+            # A stuck player has nothing for update_state to apply.
+            if child.get_available_actions():
+                reached.append(child)
+    step = max(len(reached) // count, 1)
+    return reached[::step][:count]
+
+
+def _fresh_hash(state: GameState) -> GameState:
+    state._cached_hash = None
+    return state
+
+
+def _fresh_key(state: GameState) -> GameState:
+    state._state_key = None
+    return state
+
+
+def micro_primitives(problem: LavaAndAquaProblem) -> dict:
+    """Primitive name -> (setup, call). ``setup`` turns a sampled state into
+    the argument of ``call`` outside the timed region, so mutating calls get
+    a fresh board and caching calls an empty cache every time."""
+    return {
+        "Board.copy": (lambda state: state.board, lambda board: board.copy()),
+        "GameState.update_state": (
+            lambda state: (state, state.get_available_actions()[0]),
+            lambda argument: argument[0].update_state(argument[1]),
+        ),
+        "GameState.__hash__": (_fresh_hash, hash),
+        "GameState.state_key": (_fresh_key, lambda state: state.state_key()),
+        "Observer.spread_lava_and_water": (
+            lambda state: state.board.copy(),
+            Observer.spread_lava_and_water,
+        ),
+        "GameEngine.get_available_actions": (
+            lambda state: state.board,
+            lambda board: GameEngine.get_available_actions(board, GamePhase.PLAYING),
+        ),
+        "Node.expand": (Node, lambda node: node.expand(problem.successors)),
+    }
+
+
+def measure_primitive(setup, call, states: list[GameState], min_time: float) -> tuple[float, float, float]:
+    """(calls per second, peak bytes per call, retained bytes per call).
+
+    Calls cycle over ``states`` until ``min_time`` seconds have been spent
+    inside ``call``; bytes allocated are then traced over one pass of
+    ``states``: the peak above the starting point, and what is still held
+    once ``call`` returns.
+    """
+    spent = 0.0
+    calls = 0
+    while spent < min_time:
+        for state in states:
+            argument = setup(state)
+            started = time.perf_counter()
+            call(argument)
+            spent += time.perf_counter() - started
+        calls += len(states)
+
+    peak_total = retained_total = 0
+    tracemalloc.start()
+    for state in states:
+        argument = setup(state)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = call(argument)
+        current, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - before
+        retained_total += current - before
+        del result
+    tracemalloc.stop()
+
+    return calls / spent, peak_total / len(states), retained_total / len(states)
+
+
+def run_micro(args: argparse.Namespace) -> int:
+    """Throughput and peak and retained bytes per call of the engine
+    primitives, on states sampled from a BFS of each level."""
+    Observer.spread_mode = args.spread
+    print(
+        f"{'level':<12} {'primitive':<34} {'ops/s':>11} {'us/op':>9} "
+        f"{'peak B/op':>10} {'kept B/op':>10}"
+    )
+    for level_path in level_paths(args.levels):
+        initial_state = GameState.from_level_data(LevelLoader.load_level(level_path), args.board)
+        problem = LavaAndAquaProblem(initial_state)
+        states = sample_states(problem, initial_state, args.samples, args.budget)
+
+        for name, (setup, call) in micro_primitives(problem).items():
+            if args.primitives and name not in args.primitives:
+                continue
+            rate, peak, retained = measure_primitive(setup, call, states, args.min_time)
+            print(
+                f"{level_path.stem:<12} {name:<34} {rate:>11,.0f} {1e6 / rate:>9.2f} "
+                f"{peak:>10.0f} {retained:>10.0f}"
+            )
+
+    return 0
+
+
+def worker_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Search benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    heuristics = commands.add_parser(
+        "heuristics", help="nodes saved by each heuristic against the first one"
+    )
+    heuristics.add_argument("--levels", default="levels/level_*.json", help="glob of level files")
+    heuristics.add_argument("--algorithm", choices=INFORMED_ALGORITHMS, default="a_star")
+    heuristics.add_argument(
+        "heuristics",
+        nargs="*",
+        default=list(HEURISTICS),
+        help=f"any of {', '.join(HEURISTICS)}; the first is the baseline",
+    )
+    heuristics.set_defaults(run=run_heuristics)
+
+    frontier = commands.add_parser(
+        "frontier", help="memory per state of BFS and compact BFS, under tracemalloc"
+    )
+    frontier.add_argument("--levels", default="levels/level_5.json", help="glob of level files")
+    frontier.add_argument("--state-key", choices=STATE_KEY_MODES, default=DEFAULT_STATE_KEY_MODE)
+    frontier.set_defaults(run=run_frontier)
+
+    parallel = commands.add_parser("parallel", help="parallel BFS scaling over worker counts")
+    parallel.add_argument("--levels", default="levels/level_[79].json", help="glob of level files")
+    parallel.add_argument(
+        "--workers", type=worker_counts, default=[1, 2, 4], help="comma-separated worker counts"
+    )
+    parallel.set_defaults(run=run_parallel)
+
+    solve = commands.add_parser(
+        "solve", help="end-to-end runs of every algorithm, gated against a stored baseline"
+    )
+    solve.add_argument("--levels", default="levels/level_*.json", help="glob of level files")
+    solve.add_argument(
+        "algorithms",
+        nargs="*",
+        default=list(ALGORITHMS),
+        help=f"any of {', '.join(ALGORITHMS)}",
+    )
+    solve.add_argument("--repeats", type=int, default=DEFAULT_BENCHMARK_REPEATS, help="runs per pair")
+    solve.add_argument(
+        "--time-limit", type=float, default=DEFAULT_BATCH_TIME_LIMIT, help="seconds per run"
+    )
+    solve.add_argument(
+        "--memory-limit", type=int, default=DEFAULT_BATCH_MEMORY_LIMIT, help="MiB of address space per run"
+    )
+    solve.add_argument(
+        "--parallel-jobs", type=int, default=1, help="concurrent runs (timings get noisier)"
+    )
+    solve.add_argument("--baseline", default=BENCHMARK_BASELINE_PATH, help="baseline JSON file")
+    solve.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="relative growth reported as a regression",
+    )
+    solve.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store these results as the baseline instead of comparing",
+    )
+    solve.set_defaults(
+        run=run_solve,
+        board=DEFAULT_BOARD_BACKEND,
+        spread=DEFAULT_SPREAD_MODE,
+        state_key=DEFAULT_STATE_KEY_MODE,
+        heuristic=DEFAULT_HEURISTIC,
+        dominance=DEFAULT_DOMINANCE,
+        lava_pruning=DEFAULT_LAVA_PRUNING,
+    )
+
+    micro = commands.add_parser(
+        "micro", help="ops/sec and bytes allocated per call of the engine primitives"
+    )
+    micro.add_argument("--levels", default="levels/level_*.json", help="glob of level files")
+    micro.add_argument(
+        "primitives",
+        nargs="*",
+        help="primitives to run, e.g. Board.copy Node.expand (default: all)",
+    )
+    micro.add_argument("--samples", type=int, default=50, help="sampled states per level")
+    micro.add_argument(
+        "--budget", type=int, default=2000, help="states the sampling BFS reaches before stopping"
+    )
+    micro.add_argument(
+        "--min-time", type=float, default=0.5, help="seconds of calls per primitive and level"
+    )
+    micro.add_argument("--board", choices=sorted(BOARD_BACKENDS), default=DEFAULT_BOARD_BACKEND)
+    micro.add_argument("--spread", choices=["loop", "numpy"], default=DEFAULT_SPREAD_MODE)
+    micro.set_defaults(run=run_micro)
+
+    args = parser.parse_args()
+    if args.command == "micro":
+        unknown = set(args.primitives) - set(micro_primitives(None))
+        if unknown:
+            parser.error(f"unknown primitives: {', '.join(sorted(unknown))}")
+    if args.command == "solve":
+        unknown = set(args.algorithms) - set(ALGORITHMS)
+        if unknown:
+            parser.error(f"unknown algorithms: {', '.join(sorted(unknown))}")
+    if args.command == "heuristics":
+        unknown = set(args.heuristics) - set(HEURISTICS)
+        if unknown:
+            parser.error(f"unknown heuristics: {', '.join(sorted(unknown))}")
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+from utils.types import Coordinate, EntityType, EntityId
+from core.entitiy import LAYER_CLASSES, Position, GameEntity
+from core.masks import grow_mask, iter_bits
+from core.zobrist import cell_key, entity_key
+from utils.constants import FLUID_ENTITIES, LAYER_TYPES
+
+
+LAYER_INDEX = {entity_type: index for index, entity_type in enumerate(LAYER_TYPES)}
+
+
+class BitBoard:
+    """Board backend storing every layer entity type as a width*height bitmask.
+
+    It exposes the same interface as ``core.board.Board`` so ``GameEngine``,
+    ``Observer`` and ``GameState`` run on it unchanged. Layer entities have no
+    identity of their own: their ids are derived from (layer, cell) and the
+    entity objects are materialized on demand.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        entities: dict[EntityId, GameEntity] | None = None,
+        player_id: EntityId | None = None,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.player_id = player_id
+        self.layers: dict[EntityType, int] = {t: 0 for t in LAYER_TYPES}
+        self.orbs: dict[EntityId, GameEntity] = {}
+        self.doors: dict[EntityId, GameEntity] = {}
+        self.player: GameEntity | None = None
+        self.zobrist_hash = 0
+        # Cells changed since each fluid last spread, see fluid_front.
+        self.changed: dict[EntityType, int] = dict.fromkeys(FLUID_ENTITIES, 0)
+
+        entities = entities or {}
+        # Derived layer ids start after every id handed out by the level loader.
+        self._id_base = max(entities.keys(), default=-1) + 1
+        # Materialized layer entities, shared by every copy of this board.
+        self._entity_cache: dict[EntityId, GameEntity] = {}
+
+        for entity in entities.values():
+            self.add_entity(entity)
+
+    def _cell(self, position: Position) -> int:
+        return position.y * self.width + position.x
+
+    def _mark_changed(self, cell: int) -> None:
+        changed = self.changed
+        for fluid_type in changed:
+            changed[fluid_type] |= 1 << cell
+
+    def _layer_entity(self, entity_type: EntityType, cell: int) -> GameEntity:
+        entity_id = EntityId(
+            self._id_base + LAYER_INDEX[entity_type] * self.width * self.height + cell
+        )
+        entity = self._entity_cache.get(entity_id)
+        if entity is None:
+            position = Position(cell % self.width, cell // self.width)
+            entity = LAYER_CLASSES[entity_type](entity_id, position)
+            self._entity_cache[entity_id] = entity
+        return entity
+
+    def get_entities_at(self, position: Position) -> list[GameEntity] | None:
+        if not self.is_within_bounds(position):
+            return []
+
+        found: list[GameEntity] = []
+        player = self.player
+        if player is not None and player.position == position:
+            found.append(player)
+
+        cell = self._cell(position)
+        for entity_type, mask in self.layers.items():
+            if mask >> cell & 1:
+                found.append(self._layer_entity(entity_type, cell))
+
+        for orb in self.orbs.values():
+            if orb.position == position:
+                found.append(orb)
+        for door in self.doors.values():
+            if door.position == position:
+                found.append(door)
+        return found
+
+    def is_within_bounds(self, position: Position) -> bool:
+        return 0 <= position.x < self.width and 0 <= position.y < self.height
+
+    def add_entity(self, entity: GameEntity) -> None:
+        entity_type = entity.entity_type
+        if entity_type == EntityType.PLAYER:
+            self.player = entity
+            self.player_id = entity.entity_id
+        elif entity_type == EntityType.PORTAL_ORB:
+            self.orbs[entity.entity_id] = entity
+        elif entity_type == EntityType.TIMED_DOOR:
+            self.doors[entity.entity_id] = entity
+        else:
+            bit = 1 << self._cell(entity.position)
+            if self.layers[entity_type] & bit:
+                return
+            self.layers[entity_type] |= bit
+        self.zobrist_hash ^= entity_key(entity)
+        self._mark_changed(self._cell(entity.position))
+
+    def remove_entity(self, entity_id: EntityId) -> None:
+        if self.player is not None and entity_id == self.player.entity_id:
+            self.zobrist_hash ^= entity_key(self.player)
+            self._mark_changed(self._cell(self.player.position))
+            self.player = None
+        elif entity_id in self.orbs:
+            orb = self.orbs.pop(entity_id)
+            self.zobrist_hash ^= entity_key(orb)
+            self._mark_changed(self._cell(orb.position))
+        elif entity_id in self.doors:
+            door = self.doors.pop(entity_id)
+            self.zobrist_hash ^= entity_key(door)
+            self._mark_changed(self._cell(door.position))
+        else:
+            offset = entity_id - self._id_base
+            cells = self.width * self.height
+            if not 0 <= offset < cells * len(LAYER_TYPES):
+                raise KeyError(entity_id)
+            entity_type = LAYER_TYPES[offset // cells]
+            cell = offset % cells
+            bit = 1 << cell
+            if not self.layers[entity_type] & bit:
+                raise KeyError(entity_id)
+            self.layers[entity_type] ^= bit
+            self.zobrist_hash ^= cell_key(entity_type, cell % self.width, cell // self.width)
+            self._mark_changed(cell)
+
+    def update_entity(self, entity: GameEntity) -> None:
+        self.remove_entity(entity.entity_id)
+        self.add_entity(entity)
+
+    def get_entity(self, entity_id: EntityId) -> GameEntity | None:
+        if self.player is not None and entity_id == self.player.entity_id:
+            return self.player
+        if entity_id in self.orbs:
+            return self.orbs[entity_id]
+        if entity_id in self.doors:
+            return self.doors[entity_id]
+
+        offset = entity_id - self._id_base
+        cells = self.width * self.height
+        if not 0 <= offset < cells * len(LAYER_TYPES):
+            return None
+        entity_type = LAYER_TYPES[offset // cells]
+        cell = offset % cells
+        if not self.layers[entity_type] >> cell & 1:
+            return None
+        return self._layer_entity(entity_type, cell)
+
+    def get_entities_by_type(self, entity_type: EntityType) -> list[GameEntity]:
+        if entity_type == EntityType.PLAYER:
+            return [self.player] if self.player is not None else []
+        if entity_type == EntityType.PORTAL_ORB:
+            return list(self.orbs.values())
+        if entity_type == EntityType.TIMED_DOOR:
+            return list(self.doors.values())
+        mask = self.layers.get(entity_type, 0)
+        return [self._layer_entity(entity_type, cell) for cell in iter_bits(mask)]
+
+    def fluid_front(self, fluid_type: EntityType) -> list[GameEntity]:
+        """Entities of ``fluid_type`` on or next to a cell changed since the
+        last call for that type; no other fluid of that type can spread.
+        The recorded changes are cleared."""
+        region = grow_mask(self.changed[fluid_type], self.width, self.height)
+        self.changed[fluid_type] = 0
+        front = self.layers[fluid_type] & region
+        return [self._layer_entity(fluid_type, cell) for cell in iter_bits(front)]
+
+    def layer_masks(self) -> dict[EntityType, int]:
+        """Occupied cells of every entity type, as ``y * width + x`` bitmasks."""
+        masks = self.layers.copy()
+        for entity_type, table in (
+            (EntityType.PORTAL_ORB, self.orbs),
+            (EntityType.TIMED_DOOR, self.doors),
+        ):
+            mask = 0
+            for entity in table.values():
+                mask |= 1 << self._cell(entity.position)
+            masks[entity_type] = mask
+        if self.player is not None:
+            masks[EntityType.PLAYER] = 1 << self._cell(self.player.position)
+        return masks
+
+    def count_entities_of_type(self, entity_type: EntityType) -> int:
+        if entity_type == EntityType.PLAYER:
+            return int(self.player is not None)
+        if entity_type == EntityType.PORTAL_ORB:
+            return len(self.orbs)
+        if entity_type == EntityType.TIMED_DOOR:
+            return len(self.doors)
+        return self.layers.get(entity_type, 0).bit_count()
+
+    def next_entity_id(self) -> EntityId:
+        """An id no entity on this board uses; layer entities ignore ids on add."""
+        return EntityId(self._id_base + len(LAYER_TYPES) * self.width * self.height)
+
+    def goal_position(self) -> Position | None:
+        goals = self.layers[EntityType.GOAL]
+        if not goals:
+            return None
+        cell = (goals & -goals).bit_length() - 1
+        return Position(cell % self.width, cell // self.width)
+
+    def copy(self) -> "BitBoard":
+        """Copy the board in O(layers + side tables); the masks are immutable ints."""
+        board = BitBoard.__new__(BitBoard)
+        board.width = self.width
+        board.height = self.height
+        board.player_id = self.player_id
+        board.layers = self.layers.copy()
+        board.orbs = self.orbs.copy()
+        board.doors = self.doors.copy()
+        board.player = self.player
+        board.zobrist_hash = self.zobrist_hash
+        board.changed = self.changed.copy()
+        board._id_base = self._id_base
+        board._entity_cache = self._entity_cache
+        return board
+
+    def has_entity_of_type(self, entity_type: EntityType) -> bool:
+        """Check if the board currently holds at least one entity of the given type."""
+        if entity_type == EntityType.PLAYER:
+            return self.player is not None
+        if entity_type == EntityType.PORTAL_ORB:
+            return bool(self.orbs)
+        if entity_type == EntityType.TIMED_DOOR:
+            return bool(self.doors)
+        return bool(self.layers.get(entity_type, 0))
+
+    def has_any_entity_of_types(self, entity_types: tuple[EntityType, ...]) -> bool:
+        """Fast check for whether any of the requested entity types exist on the board."""
+        return any(self.has_entity_of_type(t) for t in entity_types)
+
+    @property
+    def entities(self) -> dict[EntityId, GameEntity]:
+        """Materialized id -> entity snapshot, for code that walks every entity."""
+        snapshot: dict[EntityId, GameEntity] = {}
+        if self.player is not None:
+            snapshot[self.player.entity_id] = self.player
+        snapshot.update(self.orbs)
+        snapshot.update(self.doors)
+        for entity_type, mask in self.layers.items():
+            for cell in iter_bits(mask):
+                entity = self._layer_entity(entity_type, cell)
+                snapshot[entity.entity_id] = entity
+        return snapshot
+
+    @property
+    def position_map(self) -> dict[Coordinate, list[EntityId]]:
+        """Materialized coordinate -> ids snapshot, used by the renderer."""
+        snapshot: dict[Coordinate, list[EntityId]] = {}
+        for entity_id, entity in self.entities.items():
+            snapshot.setdefault(entity.position.to_tuple(), []).append(entity_id)
+        return snapshot
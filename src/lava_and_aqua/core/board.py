@@ -3,78 +3,251 @@ from core.entitiy import (
     Position,
     GameEntity,
 )
+from core.masks import grow_mask, iter_bits
+from core.zobrist import entity_key
+from utils.constants import FLUID_ENTITIES
+
+
+# Entities are looked up by id in chunks of 2**ID_CHUNK_BITS consecutive ids.
+ID_CHUNK_BITS = 4
 
 
 class Board:
+    """Persistent board: copies share every table they have not written.
+
+    Cells are stored one row per table (``rows[y]`` maps x to the tuple of
+    entities on that cell), entities by id in chunks of ``2**ID_CHUNK_BITS``
+    ids, and entities by type in one insertion-ordered table per type.
+    ``copy`` duplicates only the lists holding these tables, in O(height +
+    chunks + types); the first write to a table then copies that table
+    alone. A move touches a few rows, chunks and types, so sibling states
+    share almost all of their boards with their parent.
+    """
+
     def __init__(
         self,
         width: int,
         height: int,
         entities: dict[EntityId, GameEntity] | None = None,
-        position_map: dict[Coordinate, list[EntityId]] | None = None,
         player_id: EntityId | None = None,
     ) -> None:
         self.width = width
         self.height = height
-        self.entities = entities or {}
         self.player_id = player_id
+        self.zobrist_hash = 0
+        self.next_id = 0
+        self.rows: list[dict[int, tuple[GameEntity, ...]]] = [{} for _ in range(height)]
+        self.id_chunks: list[dict[EntityId, GameEntity]] = []
+        self.type_index: dict[EntityType, dict[EntityId, GameEntity]] = {}
+        # Cells changed since each fluid last spread, see fluid_front.
+        self.changed: dict[EntityType, int] = dict.fromkeys(FLUID_ENTITIES, 0)
+        # Ids of the tables this board may write in place: those it created
+        # or copied since it was last copied itself.
+        self._owned: set[int] = {id(row) for row in self.rows}
 
-        if position_map is not None:
-            self.position_map = position_map
-        else:
-            new_position_map: dict[Coordinate, list[EntityId]] = {}
-            for entity_id, entity in self.entities.items():
-                coord = entity.position.to_tuple()
-                new_position_map.setdefault(coord, []).append(entity_id)
-            self.position_map = new_position_map
+        if entities:
+            self._load(entities.values())
+
+    def _load(self, entities) -> None:
+        """``add_entity`` for every entity of a new board, writing straight
+        into the tables it owns and marking the changed cells once."""
+        rows, id_chunks, type_index = self.rows, self.id_chunks, self.type_index
+        width = self.width
+        zobrist_hash = self.zobrist_hash
+        next_id = self.next_id
+        cells = 0
+        for entity in entities:
+            entity_id = entity.entity_id
+            position = entity.position
+
+            row = rows[position.y]
+            row[position.x] = row.get(position.x, ()) + (entity,)
+
+            chunk = entity_id >> ID_CHUNK_BITS
+            while chunk >= len(id_chunks):
+                id_chunks.append(self._new_table())
+            id_chunks[chunk][entity_id] = entity
+
+            table = type_index.get(entity.entity_type)
+            if table is None:
+                table = type_index[entity.entity_type] = self._new_table()
+            table[entity_id] = entity
+
+            if entity_id >= next_id:
+                next_id = entity_id + 1
+            zobrist_hash ^= entity_key(entity)
+            cells |= 1 << (position.y * width + position.x)
+
+        self.next_id = next_id
+        self.zobrist_hash = zobrist_hash
+        for fluid_type in self.changed:
+            self.changed[fluid_type] |= cells
+
+    def _writable(self, tables: list | dict, key) -> dict:
+        """``tables[key]``, first replaced by a private copy if it is shared."""
+        table = tables[key]
+        if id(table) not in self._owned:
+            table = tables[key] = table.copy()
+            self._owned.add(id(table))
+        return table
+
+    def _new_table(self) -> dict:
+        table: dict = {}
+        self._owned.add(id(table))
+        return table
+
+    def _mark_changed(self, position: Position) -> None:
+        bit = 1 << (position.y * self.width + position.x)
+        changed = self.changed
+        for fluid_type in changed:
+            changed[fluid_type] |= bit
 
     def get_entities_at(self, position: Position) -> list[GameEntity] | None:
-        entities_id = self.position_map.get(position.to_tuple())
-        if entities_id is None:
+        if not 0 <= position.y < self.height:
             return []
-        return [self.entities[eid] for eid in entities_id]
-
+        return list(self.rows[position.y].get(position.x, ()))
 
     def is_within_bounds(self, position: Position) -> bool:
         return 0 <= position.x < self.width and 0 <= position.y < self.height
-    
+
     def add_entity(self, entity: GameEntity) -> None:
-        self.entities[entity.entity_id] = entity
-        self.position_map.setdefault(entity.position.to_tuple(), []).append(
-            entity.entity_id
-        )
+        entity_id = entity.entity_id
+        position = entity.position
+
+        row = self._writable(self.rows, position.y)
+        row[position.x] = row.get(position.x, ()) + (entity,)
+
+        chunk = entity_id >> ID_CHUNK_BITS
+        while chunk >= len(self.id_chunks):
+            self.id_chunks.append(self._new_table())
+        self._writable(self.id_chunks, chunk)[entity_id] = entity
+
+        if entity.entity_type not in self.type_index:
+            self.type_index[entity.entity_type] = self._new_table()
+        self._writable(self.type_index, entity.entity_type)[entity_id] = entity
+
+        if entity_id >= self.next_id:
+            self.next_id = entity_id + 1
+        self.zobrist_hash ^= entity_key(entity)
+        self._mark_changed(position)
+
     def remove_entity(self, entity_id: EntityId) -> None:
-        entity = self.entities[entity_id]
-        self.entities.pop(entity_id)
+        entity = self.get_entity(entity_id)
+        if entity is None:
+            raise KeyError(entity_id)
+        del self._writable(self.id_chunks, entity_id >> ID_CHUNK_BITS)[entity_id]
+        del self._writable(self.type_index, entity.entity_type)[entity_id]
+        self.zobrist_hash ^= entity_key(entity)
 
-        coord = entity.position.to_tuple()
-        self.position_map[coord].remove(entity_id)
+        position = entity.position
+        row = self._writable(self.rows, position.y)
+        remaining = tuple(other for other in row[position.x] if other.entity_id != entity_id)
+        if remaining:
+            row[position.x] = remaining
+        else:
+            del row[position.x]
+        self._mark_changed(position)
 
     def update_entity(self, entity: GameEntity) -> None:
         self.remove_entity(entity.entity_id)
         self.add_entity(entity)
 
+    def get_entity(self, entity_id: EntityId) -> GameEntity | None:
+        chunk = entity_id >> ID_CHUNK_BITS
+        if chunk >= len(self.id_chunks):
+            return None
+        return self.id_chunks[chunk].get(entity_id)
+
     def get_entities_by_type(self, entity_type: EntityType) -> list[GameEntity]:
-        return [e for e in self.entities.values() if e.entity_type == entity_type]
-    
+        return list(self.type_index.get(entity_type, {}).values())
+
+    def count_entities_of_type(self, entity_type: EntityType) -> int:
+        return len(self.type_index.get(entity_type, ()))
+
+    def next_entity_id(self) -> EntityId:
+        """An id no entity on this board uses."""
+        return EntityId(self.next_id)
+
+    def goal_position(self) -> Position | None:
+        goals = self.type_index.get(EntityType.GOAL)
+        if not goals:
+            return None
+        return next(iter(goals.values())).position
+
+    def fluid_front(self, fluid_type: EntityType) -> list[GameEntity]:
+        """Entities of ``fluid_type`` on or next to a cell changed since the
+        last call for that type; no other fluid of that type can spread.
+        The recorded changes are cleared."""
+        width = self.width
+        region = grow_mask(self.changed[fluid_type], width, self.height)
+        self.changed[fluid_type] = 0
+        fluid = self.type_index.get(fluid_type)
+        if not fluid or not region:
+            return []
+        if region.bit_count() < len(fluid):
+            return [
+                entity
+                for cell in iter_bits(region)
+                for entity in self.rows[cell // width].get(cell % width, ())
+                if entity.entity_type == fluid_type
+            ]
+        return [
+            entity
+            for entity in fluid.values()
+            if region >> (entity.position.y * width + entity.position.x) & 1
+        ]
+
+    def layer_masks(self) -> dict[EntityType, int]:
+        """Occupied cells of every entity type, as ``y * width + x`` bitmasks."""
+        masks: dict[EntityType, int] = {}
+        width = self.width
+        for entity_type, table in self.type_index.items():
+            mask = 0
+            for entity in table.values():
+                mask |= 1 << (entity.position.y * width + entity.position.x)
+            if mask:
+                masks[entity_type] = mask
+        return masks
+
     def copy(self) -> "Board":
-        """Create a shallow copy of the board. Entities are immutable, so we can reuse them."""
-        return Board(
-            width=self.width,
-            height=self.height,
-            entities=self.entities.copy(),  # Shallow copy dict (entities are immutable)
-            position_map={coord: ids.copy() for coord, ids in self.position_map.items()},  # Copy lists in position_map
-            player_id=self.player_id,
-        )
-    
+        """Copy the board in O(height + chunks + types). Every table is
+        shared with the copy, and from now on copied before either board
+        writes to it."""
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.player_id = self.player_id
+        board.zobrist_hash = self.zobrist_hash
+        board.next_id = self.next_id
+        board.rows = self.rows.copy()
+        board.id_chunks = self.id_chunks.copy()
+        board.type_index = self.type_index.copy()
+        board.changed = self.changed.copy()
+        board._owned = set()
+        self._owned.clear()
+        return board
+
     def has_entity_of_type(self, entity_type: EntityType) -> bool:
         """Check if the board currently holds at least one entity of the given type."""
-        return any(e.entity_type == entity_type for e in self.entities.values())
+        return bool(self.type_index.get(entity_type))
 
     def has_any_entity_of_types(self, entity_types: tuple[EntityType, ...]) -> bool:
         """Fast check for whether any of the requested entity types exist on the board."""
-        if not entity_types:
-            return False
-        type_set = set(entity_types)
-        return any(e.entity_type in type_set for e in self.entities.values())
-     
\ No newline at end of file
+        return any(self.type_index.get(t) for t in entity_types)
+
+    @property
+    def entities(self) -> dict[EntityId, GameEntity]:
+        """Materialized id -> entity snapshot, for code that walks every entity."""
+        snapshot: dict[EntityId, GameEntity] = {}
+        for chunk in self.id_chunks:
+            snapshot.update(chunk)
+        return snapshot
+
+    @property
+    def position_map(self) -> dict[Coordinate, list[EntityId]]:
+        """Materialized coordinate -> ids snapshot, used by the renderer."""
+        return {
+            (x, y): [entity.entity_id for entity in cell]
+            for y, row in enumerate(self.rows)
+            for x, cell in row.items()
+        }
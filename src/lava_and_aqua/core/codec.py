@@ -0,0 +1,121 @@
+from core.masks import iter_bits
+from core.entitiy import LAYER_CLASSES, GameEntity, Orb, Player, Position, TimedDoor
+from core.state import GameState
+from utils.constants import NOT_PASSABLE_WITH_FLUID, STATE_KEY_LAYERS
+from utils.types import EntityId, EntityType, GamePhase
+
+PHASES = tuple(GamePhase)
+
+
+class StateCodec:
+    """Rebuilds a ``GameState`` from its ``state_key()`` bytes.
+
+    Orbs and timed doors never move, so their ids are recovered from the
+    initial state by cell; the player keeps its id. Every other entity gets a
+    fresh id, which changes neither the Zobrist hash nor the state key.
+
+    A decoded board records as changed only the cells a fluid could still
+    spread into, so the first ``fluid_front`` after decoding returns the
+    fluid that can act instead of every fluid entity on the board.
+    """
+
+    def __init__(self, initial: GameState) -> None:
+        board = initial.board
+        self.width = board.width
+        self.height = board.height
+        self.cells = board.width * board.height
+        self.mask_bytes = (self.cells + 7) // 8
+        self.board_class = type(board)
+        self.player_id = board.player_id
+
+        self.orb_ids = {
+            orb.position.y * self.width + orb.position.x: orb.entity_id
+            for orb in board.get_entities_by_type(EntityType.PORTAL_ORB)
+        }
+        self.door_ids = {
+            door.position.y * self.width + door.position.x: door.entity_id
+            for door in board.get_entities_by_type(EntityType.TIMED_DOOR)
+        }
+        self.first_free_id = board.next_entity_id()
+        self.full_mask = (1 << self.cells) - 1
+
+        # Longest key any state of this level can have: every door still
+        # closed and the highest orb id collected.
+        orb_bytes = (max(self.orb_ids.values(), default=-1) + 1 + 7) // 8
+        self.key_width = (
+            len(STATE_KEY_LAYERS) * self.mask_bytes + 2 + 1 + orb_bytes + 2 * len(self.door_ids) + 1
+        )
+
+    def encode(self, state: GameState) -> bytes:
+        return state.state_key()
+
+    def encode_fixed(self, state: GameState) -> bytes:
+        """``encode`` zero-padded to ``key_width``; ``decode`` ignores the padding."""
+        return state.state_key().ljust(self.key_width, b"\0")
+
+    def decode(self, key: bytes, move_count: int = 0) -> GameState:
+        width = self.width
+        mask_bytes = self.mask_bytes
+        entities: dict[EntityId, GameEntity] = {}
+        next_id = self.first_free_id
+        offset = 0
+        masks: dict[EntityType, int] = {}
+
+        for entity_type in STATE_KEY_LAYERS:
+            masks[entity_type] = int.from_bytes(key[offset : offset + mask_bytes], "little")
+            offset += mask_bytes
+
+        for entity_type, entity_class in LAYER_CLASSES.items():
+            for cell in iter_bits(masks[entity_type]):
+                entities[EntityId(next_id)] = entity_class(
+                    EntityId(next_id), Position(cell % width, cell // width)
+                )
+                next_id += 1
+
+        for cell in iter_bits(masks[EntityType.PORTAL_ORB]):
+            orb_id = self.orb_ids[cell]
+            entities[orb_id] = Orb(orb_id, Position(cell % width, cell // width))
+
+        player_cell = int.from_bytes(key[offset : offset + 2], "little")
+        offset += 2
+        orb_length = key[offset]
+        offset += 1
+        orb_mask = int.from_bytes(key[offset : offset + orb_length], "little")
+        offset += orb_length
+
+        player_id = None
+        if player_cell != 0xFFFF:
+            player_id = self.player_id
+            collected = frozenset(EntityId(orb_id) for orb_id in iter_bits(orb_mask))
+            entities[player_id] = Player(
+                player_id, Position(player_cell % width, player_cell // width), collected
+            )
+
+        for cell in iter_bits(masks[EntityType.TIMED_DOOR]):
+            door_id = self.door_ids[cell]
+            remaining_time = int.from_bytes(key[offset : offset + 2], "little")
+            offset += 2
+            entities[door_id] = TimedDoor(
+                door_id, Position(cell % width, cell // width), remaining_time
+            )
+
+        phase = PHASES[key[offset]]
+        board = self.board_class(
+            width=width, height=self.height, entities=entities, player_id=player_id
+        )
+        board.changed = self.spread_targets(masks)
+        return GameState(board=board, phase=phase, move_count=move_count)
+
+    def spread_targets(self, masks: dict[EntityType, int]) -> dict[EntityType, int]:
+        """Cells each fluid could enter next: free of that fluid, and either
+        holding the other fluid or nothing in NOT_PASSABLE_WITH_FLUID."""
+        water, lava = masks[EntityType.WATER], masks[EntityType.LAVA]
+        blocked = 0
+        for entity_type in NOT_PASSABLE_WITH_FLUID:
+            blocked |= masks[entity_type]
+        full = self.full_mask
+        return {
+            EntityType.WATER: full & ~water & (lava | ~blocked),
+            EntityType.LAVA: full & ~lava & (water | ~blocked),
+        }
+
@@ -1,8 +1,9 @@
 from typing import Any
 from core.board import Board
+from core.bitboard import BitBoard
 from core.action import MoveAction
 from core.observer import Observer
-from utils.constants import FLUID_ENTITIES
+from utils.constants import DEFAULT_BOARD_BACKEND, FLUID_ENTITIES, LAYER_TYPES
 from utils.types import Coordinate, EntityId, EntityType, GamePhase, Direction
 from core.entitiy import (
     CrackedWall,
@@ -18,6 +19,12 @@ from core.entitiy import (
     Water,
 )
 
+BOARD_BACKENDS = {
+    "dict": Board,
+    "bitboard": BitBoard,
+}
+
+
 class GameEngine:
     
     @staticmethod
@@ -46,12 +53,12 @@ class GameEngine:
         if player is None or Observer.player_is_on_lava(board, player):
             return True
 
-        goal_ent = board.get_entities_by_type(EntityType.GOAL)
-        if len(goal_ent) == 0:
+        goal_position = board.goal_position()
+        if goal_position is None:
             return True
         
         if EntityType.LAVA in list(
-            ent.entity_type for ent in board.get_entities_at(goal_ent[0].position)
+            ent.entity_type for ent in board.get_entities_at(goal_position)
         ):
             return True
 
@@ -86,21 +93,31 @@ class GameEngine:
         return available_actions
     
     @classmethod
-    def create_board_from_dict(cls, data: dict[str, Any]) -> "Board":
+    def create_board_from_dict(
+        cls, data: dict[str, Any], backend: str = DEFAULT_BOARD_BACKEND
+    ) -> "Board":
+        if backend not in BOARD_BACKENDS:
+            raise ValueError(f"Unknown board backend: {backend}")
+
         width = data.get("width", 20)
         height = data.get("height", 15)
 
         entities: dict[EntityId, GameEntity] = {}
-        position_map: dict[Coordinate, list[EntityId]] = {}
         player_id: EntityId | None = None
 
         next_id = 0
         entity_data = data.get("entities", {})
+        layer_cells: set[tuple[EntityType, Position]] = set()
 
         def add_entity(entity: GameEntity) -> None:
             nonlocal next_id
-            coord = entity.position.to_tuple()
-            position_map.setdefault(coord, []).append(entity.entity_id)
+            if entity.entity_type in LAYER_TYPES:
+                # A layer entity listed twice for one cell is one entity
+                # (level_1 lists a wall twice); BitBoard can hold it once.
+                cell = (entity.entity_type, entity.position)
+                if cell in layer_cells:
+                    return
+                layer_cells.add(cell)
             entities[entity.entity_id] = entity
 
         def parse_position(data: dict[str, Any]) -> Position:
@@ -139,11 +156,10 @@ class GameEngine:
             add_entity(entity)
             next_id += 1
 
-        return Board(
+        return BOARD_BACKENDS[backend](
             width=width,
             height=height,
             entities=entities,
-            position_map=position_map,
             player_id=player_id,
         )
 
@@ -152,7 +168,7 @@ class GameEngine:
     def get_player(board: Board) -> Player | None:
         if board.player_id is None:
             return None
-        entity = board.entities.get(board.player_id)
+        entity = board.get_entity(board.player_id)
         if isinstance(entity, Player):
             return entity
         return None
@@ -169,9 +185,15 @@ class GameEngine:
         return Observer.spread_lava_and_water(board)
     
     @staticmethod
-    def apply_move(board: Board, player: Player, direction: Direction) -> None:
+    def apply_move(
+        board: Board,
+        player: Player,
+        direction: Direction,
+        entities_at_target: list[GameEntity] | None = None,
+    ) -> None:
         target_pos = player.position.move(direction.dx, direction.dy)
-        entities_at_target = board.get_entities_at(target_pos)
+        if entities_at_target is None:
+            entities_at_target = board.get_entities_at(target_pos)
 
         if entities_at_target is None:
             pass  
@@ -109,3 +109,14 @@ class TimedDoor(Entity):
 
 
 GameEntity = Player | MetalBox | Wall | Goal | Lava | Water | Orb | CrackedWall | TimedDoor
+
+# Entity class of each type in utils.constants.LAYER_TYPES, rebuilt from a
+# cell alone.
+LAYER_CLASSES = {
+    EntityType.WALL: Wall,
+    EntityType.LAVA: Lava,
+    EntityType.WATER: Water,
+    EntityType.METAL_BOX: MetalBox,
+    EntityType.GOAL: Goal,
+    EntityType.CRACKED_WALL: CrackedWall,
+}
@@ -0,0 +1,26 @@
+"""Cell-set helpers shared by both board backends, on ``y * width + x`` bitmasks."""
+
+import functools
+
+
+def iter_bits(mask: int):
+    """Yield the index of every set bit in ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@functools.cache
+def _grid_masks(width: int, height: int) -> tuple[int, int, int]:
+    full = (1 << width * height) - 1
+    first_column = sum(1 << y * width for y in range(height))
+    return full, first_column, first_column << width - 1
+
+
+def grow_mask(mask: int, width: int, height: int) -> int:
+    """``mask`` plus the four neighbours of each of its cells."""
+    full, first_column, last_column = _grid_masks(width, height)
+    grown = mask | mask << width | mask >> width
+    grown |= (mask & ~last_column) << 1 | (mask & ~first_column) >> 1
+    return grown & full
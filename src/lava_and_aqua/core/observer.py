@@ -2,10 +2,25 @@ from core.board import Board
 from core.entitiy import Entity, GameEntity, Orb, Player, Position
 from core.action import MoveAction
 from utils.types import EntityType, EntityId, Direction
-from utils.constants import SOLID_OBSTACLES, BLOCKING_ENTITIES, NOT_PASSABLE_WITH_FLUID
+from utils.constants import (
+    DEFAULT_INCREMENTAL_SPREAD,
+    DEFAULT_SPREAD_MODE,
+    SOLID_OBSTACLES,
+    BLOCKING_ENTITIES,
+    NOT_PASSABLE_WITH_FLUID,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the vectorized spread mode
+    np = None
 
 
 class Observer:
+    # "loop" walks fluid entities one by one, "numpy" uses shifted boolean grids.
+    spread_mode: str = DEFAULT_SPREAD_MODE
+    # The loop mode walks only the fluid front unless this is off.
+    incremental_spread: bool = DEFAULT_INCREMENTAL_SPREAD
 
     @staticmethod
     def can_move(board: Board, player: Player, direction: Direction) -> bool:
@@ -16,8 +31,13 @@ class Observer:
         if not board.is_within_bounds(target_pos):
             return False
 
-        entities = board.get_entities_at(target_pos)
+        return Observer.can_enter(board, board.get_entities_at(target_pos), direction)
 
+    @staticmethod
+    def can_enter(
+        board: Board, entities: list[GameEntity], direction: Direction
+    ) -> bool:
+        """Whether the player can step onto a cell holding ``entities``."""
         if not entities:
             return True
 
@@ -77,16 +97,17 @@ class Observer:
 
     @staticmethod
     def has_collected_all_orbs(board: Board, player: Player) -> bool:
-        all_orbs = board.get_entities_by_type(EntityType.PORTAL_ORB)
         if player is None:
             return False
-        total_orbs_count = len(all_orbs) + len(player.collected_orbs)
-        return len(player.collected_orbs) == total_orbs_count and len(all_orbs) == 0
+        return board.count_entities_of_type(EntityType.PORTAL_ORB) == 0
 
     @staticmethod
     def spread_lava_and_water(board: Board) -> None:
+        if Observer.spread_mode == "numpy":
+            return Observer.spread_lava_and_water_vectorized(board)
+
         board_state = board
-        next_id = max(board_state.entities.keys(), default=EntityId(-1)) + 1
+        next_id = board_state.next_entity_id()
 
         next_id = Observer._spread_fluid(
             board_state, EntityType.WATER, EntityType.LAVA, next_id
@@ -106,7 +127,11 @@ class Observer:
         positions_to_make_walls: set[Position] = set()
         new_fluid_positions: set[Position] = set()
 
-        fluid_entities = board.get_entities_by_type(fluid_type)
+        # Taken in both modes, so the board's record of changes is cleared
+        # whenever this fluid spreads.
+        fluid_entities = board.fluid_front(fluid_type)
+        if not Observer.incremental_spread:
+            fluid_entities = board.get_entities_by_type(fluid_type)
 
         for fluid in fluid_entities:
             for direction in Direction:
@@ -153,3 +178,80 @@ class Observer:
             board.add_entity(wall)
 
         return next_id
+
+    @staticmethod
+    def spread_lava_and_water_vectorized(board: Board) -> None:
+        """Same water-then-lava spread as the loop version, on boolean grids."""
+        if np is None:
+            raise ImportError("numpy is required for the vectorized spread mode")
+
+        next_id = board.next_entity_id()
+
+        water = Observer._type_grid(board, (EntityType.WATER,))
+        lava = Observer._type_grid(board, (EntityType.LAVA,))
+        blockers = Observer._type_grid(board, tuple(NOT_PASSABLE_WITH_FLUID))
+
+        new_water, water_walls = Observer._spread_grid(water, lava, blockers)
+        water |= new_water
+        Observer._make_grid_walls(water_walls, water, lava, blockers)
+
+        new_lava, lava_walls = Observer._spread_grid(lava, water, blockers)
+        lava |= new_lava
+        Observer._make_grid_walls(lava_walls, water, lava, blockers)
+
+        next_id = Observer._apply_grid_spread(
+            board, EntityType.WATER, new_water, water_walls, next_id
+        )
+        Observer._apply_grid_spread(
+            board, EntityType.LAVA, new_lava, lava_walls, next_id
+        )
+
+    @staticmethod
+    def _type_grid(board: Board, entity_types: tuple[EntityType, ...]):
+        grid = np.zeros((board.height, board.width), dtype=bool)
+        for entity_type in entity_types:
+            for entity in board.get_entities_by_type(entity_type):
+                grid[entity.position.y, entity.position.x] = True
+        return grid
+
+    @staticmethod
+    def _spread_grid(fluid, collision_fluid, blockers):
+        reach = np.zeros_like(fluid)
+        reach[1:, :] |= fluid[:-1, :]
+        reach[:-1, :] |= fluid[1:, :]
+        reach[:, 1:] |= fluid[:, :-1]
+        reach[:, :-1] |= fluid[:, 1:]
+
+        walls = reach & collision_fluid
+        new_fluid = reach & ~collision_fluid & ~fluid & ~blockers
+        return new_fluid, walls
+
+    @staticmethod
+    def _make_grid_walls(walls, water, lava, blockers) -> None:
+        # A collision clears everything but orbs and leaves a wall behind.
+        water &= ~walls
+        lava &= ~walls
+        blockers |= walls
+
+    @staticmethod
+    def _apply_grid_spread(
+        board: Board,
+        fluid_type: EntityType,
+        new_fluid,
+        walls,
+        next_id: int,
+    ) -> int:
+        for y, x in zip(*np.nonzero(new_fluid)):
+            board.add_entity(Entity(EntityId(next_id), fluid_type, Position(int(x), int(y))))
+            next_id += 1
+
+        for y, x in zip(*np.nonzero(walls)):
+            pos = Position(int(x), int(y))
+            for existing in board.get_entities_at(pos):
+                if not isinstance(existing, Orb):
+                    board.remove_entity(existing.entity_id)
+
+            board.add_entity(Entity(EntityId(next_id), EntityType.WALL, pos))
+            next_id += 1
+
+        return next_id
@@ -1,12 +1,18 @@
 import struct
-from typing import Any
-import xxhash
+from typing import Any, Iterator
 from core.action import MoveAction
-from utils.types import GamePhase
+from core.entitiy import GameEntity, Player
+from core.observer import Observer
+from utils.types import Direction, EntityType, GamePhase
+from utils.constants import DEFAULT_BOARD_BACKEND, STATE_KEY_LAYERS
 from core.board import Board
 from core.engine import GameEngine
 
 
+_PHASE_CODES = {phase: code for code, phase in enumerate(GamePhase)}
+
+MOVE_ACTIONS = {direction: MoveAction(direction) for direction in Direction}
+
 class GameState:
     
     def __init__(
@@ -22,10 +28,13 @@ class GameState:
         self.move_count = move_count
         self._player_cache = player
         self._cached_hash = _cached_hash  # Cache the hash
+        self._state_key: bytes | None = None
 
     @classmethod
-    def from_level_data(cls, level_data: dict[str, Any]) -> "GameState":
-        board = GameEngine.create_board_from_dict(level_data)
+    def from_level_data(
+        cls, level_data: dict[str, Any], backend: str = DEFAULT_BOARD_BACKEND
+    ) -> "GameState":
+        board = GameEngine.create_board_from_dict(level_data, backend)
         player = GameEngine.get_player(board)
         return cls(board=board, player=player)
 
@@ -45,23 +54,61 @@ class GameState:
         return GameEngine.get_available_actions(self.board, self.phase)
 
     def update_state(self, action: MoveAction) -> "GameState":
+        player = GameEngine.get_player(self.board)
+        return self._advance(player, action.direction)
+
+    def successors(self, engine=GameEngine) -> Iterator[tuple[MoveAction, "GameState"]]:
+        """Yield ``(action, child)`` for every valid action.
+
+        Fuses ``get_available_actions`` and ``update_state``: the player and
+        each target cell are looked up once and shared by the validity check
+        and the move. The moves are made by ``engine``, ``GameEngine`` or an
+        object with its interface such as the search stats' timed engine.
+        """
+        if self.is_terminal():
+            return
+
+        player = self.get_player()
+        if player is None:
+            return
+
+        board = self.board
+        for direction in Direction:
+            target_pos = player.position.move(direction.dx, direction.dy)
+            if not board.is_within_bounds(target_pos):
+                continue
+
+            entities_at_target = board.get_entities_at(target_pos)
+            if not Observer.can_enter(board, entities_at_target, direction):
+                continue
+
+            yield MOVE_ACTIONS[direction], self._advance(
+                player, direction, entities_at_target, engine
+            )
+
+    def _advance(
+        self,
+        player: Player,
+        direction: Direction,
+        entities_at_target: list[GameEntity] | None = None,
+        engine=GameEngine,
+    ) -> "GameState":
         new_board = self.board.copy()
         new_phase = self.phase
         new_move_count = self.move_count + 1
         
-        player = GameEngine.get_player(new_board)
-        GameEngine.apply_move(new_board, player, action.direction)
+        engine.apply_move(new_board, player, direction, entities_at_target)
 
-        if GameEngine.is_won(new_board, new_phase):
+        if engine.is_won(new_board, new_phase):
             new_phase = GamePhase.WON  
         
-        GameEngine.spread_lava_and_water(new_board)
-        GameEngine.tick_TIMED_DOORs(new_board)
+        engine.spread_lava_and_water(new_board)
+        engine.tick_TIMED_DOORs(new_board)
 
-        if GameEngine.is_lost(new_board, new_phase) and new_phase != GamePhase.WON:
+        if engine.is_lost(new_board, new_phase) and new_phase != GamePhase.WON:
             new_phase = GamePhase.LOST
         
-        next_player = GameEngine.get_player(new_board)
+        next_player = engine.get_player(new_board)
         return GameState(
             board=new_board, 
             phase=new_phase, 
@@ -85,59 +132,59 @@ class GameState:
         )
 
     def __hash__(self) -> int:
-        if self._cached_hash is not None:
-            return self._cached_hash
-
-        hasher = xxhash.xxh64()
-
-        position_to_entities: dict[tuple[int, int], list[tuple[str, Any]]] = {}
-        
-        for ent in self.board.entities.values():
-            pos = (ent.position.x, ent.position.y)
-            entity_type = ent.entity_type.value
-            
-            # Collect extra data for special entities
-            extra_data = None
-            if hasattr(ent, "collected_orbs"):
-                extra_data = tuple(sorted(int(x) for x in ent.collected_orbs))
-            elif hasattr(ent, "remaining_time"):
-                extra_data = ent.remaining_time
-            
-            if pos not in position_to_entities:
-                position_to_entities[pos] = []
-            
-            position_to_entities[pos].append((entity_type, extra_data))
-        
-        # Sort positions for deterministic hashing
-        sorted_positions = sorted(position_to_entities.items())
-        
-        hasher.update(struct.pack("<i", len(sorted_positions)))
-        
-        for pos, entities_at_pos in sorted_positions:
-            hasher.update(struct.pack("<ii", pos[0], pos[1]))
-            
-            entities_at_pos.sort()
-            
-            hasher.update(struct.pack("<i", len(entities_at_pos)))
-            
-            for entity_type, extra_data in entities_at_pos:
-                hasher.update(entity_type.encode("utf-8"))
-                
-                if extra_data is not None:
-                    if isinstance(extra_data, tuple):
-                        hasher.update(struct.pack("<i", len(extra_data)))
-                        for orb in extra_data:
-                            hasher.update(struct.pack("<i", orb))
-                    elif isinstance(extra_data, int):
-                        hasher.update(struct.pack("<i", extra_data))
-
-        self._cached_hash = hasher.intdigest()
+        # Boards maintain a Zobrist hash incrementally on every mutation.
+        if self._cached_hash is None:
+            self._cached_hash = self.board.zobrist_hash
         return self._cached_hash
     
+    def state_key(self) -> bytes:
+        """Canonical packed encoding of everything that distinguishes two states.
+
+        Layout: one ``y * width + x`` bitmask per ``STATE_KEY_LAYERS`` type,
+        the player cell (0xFFFF without a player), the collected-orb id bitmask
+        behind its byte length, every door timer in cell order, and the phase.
+        """
+        if self._state_key is not None:
+            return self._state_key
+
+        board = self.board
+        mask_bytes = (board.width * board.height + 7) // 8
+        masks = board.layer_masks()
+
+        key = bytearray()
+        for entity_type in STATE_KEY_LAYERS:
+            key += masks.get(entity_type, 0).to_bytes(mask_bytes, "little")
+
+        player = self.get_player()
+        orb_mask = 0
+        if player is None:
+            key += struct.pack("<H", 0xFFFF)
+        else:
+            key += struct.pack("<H", player.position.y * board.width + player.position.x)
+            for orb_id in player.collected_orbs:
+                orb_mask |= 1 << orb_id
+        orb_bytes = orb_mask.to_bytes((orb_mask.bit_length() + 7) // 8, "little")
+        key.append(len(orb_bytes))
+        key += orb_bytes
+
+        doors = sorted(
+            board.get_entities_by_type(EntityType.TIMED_DOOR),
+            key=lambda door: (door.position.y, door.position.x),
+        )
+        for door in doors:
+            key += struct.pack("<H", door.remaining_time)
+
+        key.append(_PHASE_CODES[self.phase])
+        self._state_key = bytes(key)
+        return self._state_key
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, GameState):
             return False
-        return self.__hash__() == other.__hash__()
+        return (
+            self.__hash__() == other.__hash__()
+            and self.state_key() == other.state_key()
+        )
 
     def get_player(self):
         if self._player_cache is None:
@@ -0,0 +1,55 @@
+import struct
+from typing import Iterable
+
+import xxhash
+
+from utils.types import EntityType
+from core.entitiy import GameEntity
+
+
+TYPE_CODES = {entity_type: code for code, entity_type in enumerate(EntityType)}
+
+_PLAYER_CODE = TYPE_CODES[EntityType.PLAYER]
+_DOOR_CODE = TYPE_CODES[EntityType.TIMED_DOOR]
+
+# Keys are derived from their fields rather than drawn from a random table, so
+# every process computes the same hash for the same state.
+_KEYS: dict[tuple[int, ...], int] = {}
+
+
+def _key(*fields: int) -> int:
+    key = _KEYS.get(fields)
+    if key is None:
+        key = xxhash.xxh64_intdigest(struct.pack(f"<{len(fields)}i", *fields))
+        _KEYS[fields] = key
+    return key
+
+
+def cell_key(entity_type: EntityType, x: int, y: int) -> int:
+    """Key of a plain entity of ``entity_type`` standing at (x, y)."""
+    return _key(TYPE_CODES[entity_type], x, y)
+
+
+def entity_key(entity: GameEntity) -> int:
+    """Key of one entity, including the player's orbs and a door's timer."""
+    code = TYPE_CODES[entity.entity_type]
+    x, y = entity.position.x, entity.position.y
+
+    if code == _PLAYER_CODE:
+        key = _key(code, x, y)
+        for orb_id in entity.collected_orbs:
+            key ^= _key(code, -1, -1, orb_id)
+        return key
+
+    if code == _DOOR_CODE:
+        return _key(code, x, y, entity.remaining_time)
+
+    return _key(code, x, y)
+
+
+def board_hash(entities: Iterable[GameEntity]) -> int:
+    """Hash a board from scratch; boards keep this up to date incrementally."""
+    value = 0
+    for entity in entities:
+        value ^= entity_key(entity)
+    return value
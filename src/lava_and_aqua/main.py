@@ -1,14 +1,50 @@
+import argparse
+import contextlib
 import time
 
-from ai.search import SearchAlgorithm
+from ai.search import STATE_KEY_MODES, SearchAlgorithm
 from ai.problem import LavaAndAquaProblem
 from core.state import GameState
 from utils.rendering import print_board
 from utils.level_loader import LevelLoader
+from utils.profiler import StackSampler
 from play import interactive_demo
 from ai.node import Node
 
 from pyfiglet import Figlet
+from core.engine import BOARD_BACKENDS
+from core.observer import Observer
+from ai.heuristics import HEURISTICS
+from ai.instrumentation import SearchLimits, SearchStats
+from ai.memory import MEMORY_POLICIES, MemoryBudget
+from ai.portfolio import PORTFOLIO_MODES, Portfolio
+from utils.constants import (
+    DEFAULT_BOARD_BACKEND,
+    DEFAULT_CHECKPOINT_PATH,
+    DEFAULT_DOMINANCE,
+    DEFAULT_HEURISTIC,
+    DEFAULT_LAVA_PRUNING,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_MEMORY_POLICY,
+    DEFAULT_NODE_BUDGET,
+    DEFAULT_PORTFOLIO_BUDGET,
+    DEFAULT_PORTFOLIO_MODE,
+    DEFAULT_PROFILE_OUTPUT,
+    DEFAULT_PROFILE_TOP,
+    DEFAULT_SPREAD_MODE,
+    DEFAULT_STATE_KEY_MODE,
+    DEFAULT_TIME_BUDGET,
+)
+
+
+# Search mode saved in a checkpoint -> name printed with its details.
+RESUMED_ALGORITHMS = {
+    "dfs": "DFS",
+    "bfs": "BFS",
+    "bfs_compact": "BFS",
+    "ucs": "UCS",
+    "a_star": "A*",
+}
 
 
 def game_start():
@@ -25,44 +61,270 @@ def game_start():
     return level_data, level_path
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Lava & Aqua")
+    parser.add_argument(
+        "--board",
+        choices=sorted(BOARD_BACKENDS),
+        default=DEFAULT_BOARD_BACKEND,
+        help="board storage backend",
+    )
+    parser.add_argument(
+        "--spread",
+        choices=["loop", "numpy"],
+        default=DEFAULT_SPREAD_MODE,
+        help="fluid spreading implementation",
+    )
+    parser.add_argument(
+        "--state-key",
+        choices=STATE_KEY_MODES,
+        default=DEFAULT_STATE_KEY_MODE,
+        help="how searches deduplicate states",
+    )
+    parser.add_argument(
+        "--heuristic",
+        choices=HEURISTICS,
+        default=DEFAULT_HEURISTIC,
+        help="goal distance estimate for hill climbing and A*",
+    )
+    bfs_mode = parser.add_mutually_exclusive_group()
+    bfs_mode.add_argument(
+        "--compact",
+        action="store_true",
+        help="run BFS over packed states instead of Node objects",
+    )
+    bfs_mode.add_argument(
+        "--external",
+        action="store_true",
+        help="run BFS with its layers on disk (RAM ceiling in utils/constants.py)",
+    )
+    bfs_mode.add_argument(
+        "--workers",
+        type=int,
+        help="run BFS over this many worker processes (experimental, untested on multi-core hosts)",
+    )
+    parser.add_argument(
+        "--dominance",
+        action=argparse.BooleanOptionalAction,
+        default=DEFAULT_DOMINANCE,
+        help="prune states dominated by a closed state (BFS, UCS and A*)",
+    )
+    parser.add_argument(
+        "--lava-pruning",
+        action=argparse.BooleanOptionalAction,
+        default=DEFAULT_LAVA_PRUNING,
+        help="drop states that lava cuts off from the goal or a remaining orb",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="collect search counters and phase timers and print them as JSON",
+    )
+    parser.add_argument(
+        "--progress",
+        type=int,
+        metavar="N",
+        help="report search progress every N expansions (implies --stats)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET,
+        metavar="MIB",
+        help="stop the search cleanly once the process RSS passes this many MiB",
+    )
+    parser.add_argument(
+        "--on-memory-budget",
+        choices=MEMORY_POLICIES,
+        default=DEFAULT_MEMORY_POLICY,
+        help="stop, or rerun BFS in external-memory mode, when the budget is hit",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        metavar="SECONDS",
+        help="stop the search after this many seconds",
+    )
+    parser.add_argument(
+        "--node-budget",
+        type=int,
+        default=DEFAULT_NODE_BUDGET,
+        metavar="N",
+        help="stop the search after N expansions",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        nargs="?",
+        const=DEFAULT_CHECKPOINT_PATH,
+        metavar="PATH",
+        help=f"save a search stopped by a budget here, to be resumed (DFS, BFS, UCS and A*; default {DEFAULT_CHECKPOINT_PATH})",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="PATH",
+        help="continue the search saved in this checkpoint instead of choosing a game mode",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_OUTPUT,
+        metavar="PATH",
+        help=f"sample the search's stacks and write them collapsed for flamegraphs (default {DEFAULT_PROFILE_OUTPUT})",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=DEFAULT_PROFILE_TOP,
+        help="functions listed in the profile summary",
+    )
+    parser.add_argument(
+        "--portfolio-mode",
+        choices=PORTFOLIO_MODES,
+        default=DEFAULT_PORTFOLIO_MODE,
+        help="portfolio play: take the first solution or the shortest within the budget",
+    )
+    parser.add_argument(
+        "--portfolio-budget",
+        type=float,
+        default=DEFAULT_PORTFOLIO_BUDGET,
+        help="seconds the portfolio waits for its strategies",
+    )
+    args = parser.parse_args()
+    if args.compact or args.external or args.workers:
+        if args.state_key != "exact":
+            parser.error("--compact, --external and --workers need --state-key exact")
+        if args.dominance:
+            parser.error("--compact, --external and --workers do not support --dominance")
+    return args
+
+
+def print_progress(stats: SearchStats) -> None:
+    print(
+        f"[{stats.running_seconds():8.1f}s] expanded {stats.expanded:,}  "
+        f"generated {stats.generated:,}  frontier {stats.max_frontier:,}  "
+        f"visited {stats.max_visited:,}"
+    )
+
+
+def portfolio_play(initial_state: GameState, level_path: str, args: argparse.Namespace) -> None:
+    problem = LavaAndAquaProblem(initial_state, args.lava_pruning)
+    portfolio = Portfolio(
+        problem,
+        mode=args.portfolio_mode,
+        time_budget=args.portfolio_budget,
+        key_mode=args.state_key,
+        heuristic=args.heuristic,
+    )
+    start_time = time.perf_counter()
+    solution = portfolio.run(Node(initial_state))
+    duration = time.perf_counter() - start_time
+
+    for strategy in portfolio.strategies:
+        if strategy not in portfolio.outcomes:
+            print(f"{strategy}: cancelled")
+            continue
+        moves, strategy_duration, created = portfolio.outcomes[strategy]
+        result = "no solution" if moves is None else f"{moves} moves"
+        print(f"{strategy}: {result} in {strategy_duration:.3f}s, {created} nodes")
+
+    if solution is None:
+        print("No Solution found")
+    else:
+        for state in solution.path_states():
+            print()
+            print_board(state)
+        print(f"\nWinner: {portfolio.winner}")
+        print("Path :", [action.direction.name for action in solution.path_actions()])
+        print("Number of moves :", solution.path_cost)
+    print(f"Duration: {duration:.6f} seconds")
+    portfolio.record(level_path[7:-5])
+
+
 def main():
+    args = parse_args()
+    Observer.spread_mode = args.spread
     level_data, level_path = game_start()
-    initial_state = GameState.from_level_data(level_data)
+    initial_state = GameState.from_level_data(level_data, args.board)
     print_board(initial_state)
     while True:
-        print(
-            "Game Modes:\n 1. User Play\n 2. DFS Play\n 3. BFS Play\n 4. UCS Play\n 5. Hill climbing Backtrack Play\n 6. A* Play"
-        )
-        command = input("\nEnter command: ").strip().lower()
+        if args.resume:
+            command = "resume"
+        else:
+            print(
+                "Game Modes:\n 1. User Play\n 2. DFS Play\n 3. BFS Play\n 4. UCS Play\n 5. Hill climbing Backtrack Play\n 6. A* Play\n 7. IDDFS Play\n 8. Portfolio Play"
+            )
+            command = input("\nEnter command: ").strip().lower()
         if command == "1":
             interactive_demo(initial_state, level_data)
             break
+        elif command == "8":
+            portfolio_play(initial_state, level_path, args)
+            break
         else:
-            problem = LavaAndAquaProblem(initial_state)
-            search = SearchAlgorithm(problem)
+            problem = LavaAndAquaProblem(initial_state, args.lava_pruning)
+            stats = None
+            if args.progress:
+                stats = SearchStats(progress=print_progress, progress_interval=args.progress)
+            elif args.stats:
+                stats = SearchStats()
+            memory_budget = None
+            if args.memory_budget is not None:
+                memory_budget = MemoryBudget(args.memory_budget * 2**20, args.on_memory_budget)
+            limits = None
+            if args.time_budget is not None or args.node_budget is not None:
+                limits = SearchLimits(args.time_budget, args.node_budget)
+            search = SearchAlgorithm(
+                problem,
+                args.state_key,
+                args.dominance,
+                stats,
+                memory_budget,
+                limits,
+                args.checkpoint,
+            )
+            sampler = StackSampler() if args.profile else None
             search.start_time = time.perf_counter()
             algorithm_name = None
-            if command == "2":
-                search.dfs(Node(initial_state))
-                algorithm_name = "DFS"
-            elif command == "3":
-                search.bfs(Node(initial_state))
-                algorithm_name = "BFS"
-            elif command == "4":
-                search.ucs(Node(initial_state))
-                algorithm_name = "UCS"
-            elif command == "5":
-                search.hill_climbing_backtrack(Node(initial_state))
-                algorithm_name = "Hill Climbing Backtrack"
-            elif command == "6":
-                search.a_star(Node(initial_state))
-                algorithm_name = "A*"
-            else:
-                print("invalid command")
-                continue
+            with sampler or contextlib.nullcontext():
+                if command == "resume":
+                    mode = search.resume(args.resume, Node(initial_state))
+                    algorithm_name = RESUMED_ALGORITHMS[mode]
+                elif command == "2":
+                    search.dfs(Node(initial_state))
+                    algorithm_name = "DFS"
+                elif command == "3":
+                    if args.compact:
+                        search.bfs_compact(Node(initial_state))
+                    elif args.external:
+                        search.bfs_external(Node(initial_state))
+                    elif args.workers:
+                        search.bfs_parallel(Node(initial_state), args.workers)
+                    else:
+                        search.bfs(Node(initial_state))
+                    algorithm_name = "BFS"
+                elif command == "4":
+                    search.ucs(Node(initial_state))
+                    algorithm_name = "UCS"
+                elif command == "5":
+                    search.hill_climbing_backtrack(Node(initial_state), args.heuristic)
+                    algorithm_name = "Hill Climbing Backtrack"
+                elif command == "6":
+                    search.a_star(Node(initial_state), args.heuristic)
+                    algorithm_name = "A*"
+                elif command == "7":
+                    search.iddfs(Node(initial_state))
+                    algorithm_name = "IDDFS"
+                else:
+                    print("invalid command")
+                    continue
 
             search.end_time = time.perf_counter()
             search.print_search_details(algorithm_name)
+            if sampler is not None:
+                sampler.write_collapsed(args.profile)
+                print(f"\nProfile ({args.profile}):")
+                print(sampler.summary(args.profile_top))
             # search.save_search_details_to_csv(algorithm_name, level_path[7:-5])
             break
 
@@ -1,9 +1,92 @@
+import os
+
 from utils.types import EntityType
 
 
 DEFAULT_BOARD_WIDTH = 20
 DEFAULT_BOARD_HEIGHT = 15
 
+# Board storage backend: "dict" (entity dict + position map) or "bitboard".
+DEFAULT_BOARD_BACKEND = "dict"
+
+# State key used to deduplicate search states: "exact" (packed bytes),
+# "digest" (128-bit digest of the packed bytes) or "hash" (64-bit Zobrist).
+DEFAULT_STATE_KEY_MODE = "exact"
+
+# Heuristic for A* and hill climbing: "distance_field" (BFS from the goal
+# around permanent walls), "pattern_db" (orb-aware, cached on disk) or
+# "manhattan".
+DEFAULT_HEURISTIC = "distance_field"
+
+# Where pattern databases are cached, one file per level content hash.
+PATTERN_DB_CACHE_DIR = ".cache/pattern_db"
+
+# Prune states closed by bfs, ucs and a_star when a closed state with the
+# same layout has collected a superset of their orbs at no higher cost.
+DEFAULT_DOMINANCE = False
+
+# External-memory BFS: RAM ceiling for the layer being built (bytes), where
+# layer files go, and how many previous layers a new one is deduplicated
+# against (None for all of them).
+EXTERNAL_BFS_MEMORY_LIMIT = 256 * 2**20
+EXTERNAL_BFS_DIR = ".cache/external_bfs"
+EXTERNAL_BFS_DEDUP_LAYERS = None
+
+# Worker processes of the parallel BFS.
+DEFAULT_BFS_WORKERS = os.cpu_count() or 1
+
+# Portfolio solver: strategies raced against each other, "first" (first
+# solution wins) or "best" (shortest within the budget), and the budget in
+# seconds (None to wait for every strategy).
+DEFAULT_PORTFOLIO_STRATEGIES = ("dfs", "bfs", "ucs", "hill_climbing_backtrack", "a_star")
+DEFAULT_PORTFOLIO_MODE = "first"
+DEFAULT_PORTFOLIO_BUDGET = 300.0
+
+# Batch solver: concurrent jobs, and each job's wall-clock limit (seconds)
+# and address-space limit (MiB); None for no limit.
+DEFAULT_BATCH_JOBS = os.cpu_count() or 1
+DEFAULT_BATCH_TIME_LIMIT = 300.0
+DEFAULT_BATCH_MEMORY_LIMIT = None
+
+# End-to-end solver benchmark: runs per (level, algorithm), the stored
+# baseline it is compared against, and the relative slowdown (or growth in
+# nodes or memory) reported as a regression.
+DEFAULT_BENCHMARK_REPEATS = 3
+BENCHMARK_BASELINE_PATH = "statistics/baseline.json"
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Expansions between two progress reports of an instrumented search.
+DEFAULT_PROGRESS_INTERVAL = 10_000
+
+# Sampling profiler (--profile): CPU seconds between stack samples, where the
+# collapsed stacks go, and how many functions the summary lists.
+DEFAULT_PROFILE_INTERVAL = 0.005
+DEFAULT_PROFILE_OUTPUT = ".cache/profile.collapsed"
+DEFAULT_PROFILE_TOP = 15
+
+# Memory budget of a search in MiB (None for no budget), what happens when
+# the process RSS passes it ("stop", or "fallback" to external-memory BFS),
+# and how many expansions pass between two checks.
+DEFAULT_MEMORY_BUDGET = None
+DEFAULT_MEMORY_POLICY = "stop"
+DEFAULT_MEMORY_CHECK_INTERVAL = 1000
+
+# Time (seconds) and node (expansions) budgets of a search, None for no
+# limit, and where a search stopped by one writes its checkpoint.
+DEFAULT_TIME_BUDGET = None
+DEFAULT_NODE_BUDGET = None
+DEFAULT_CHECKPOINT_PATH = ".cache/search.ckpt"
+
+# Drop generated states that lava cuts off from the goal or a remaining orb.
+DEFAULT_LAVA_PRUNING = False
+
+# Fluid spreading: "loop" (per entity) or "numpy" (vectorized, needs numpy).
+DEFAULT_SPREAD_MODE = "loop"
+
+# Loop spreading only walks the fluid front: fluid on or next to a cell that
+# changed since that fluid last spread. False re-scans every fluid cell.
+DEFAULT_INCREMENTAL_SPREAD = True
+
 
 BLOCKING_ENTITIES = {
     EntityType.WALL,
@@ -20,8 +103,32 @@ SOLID_OBSTACLES = {
 
 FLUID_ENTITIES = {EntityType.LAVA, EntityType.WATER}
 
+# Entity types with no data beyond their cell, which BitBoard stores as one
+# bitmask each. Players, orbs and timed doors carry per-entity data (ids,
+# collected orbs, timers) instead.
+LAYER_TYPES: tuple[EntityType, ...] = (
+    EntityType.WALL,
+    EntityType.LAVA,
+    EntityType.WATER,
+    EntityType.METAL_BOX,
+    EntityType.GOAL,
+    EntityType.CRACKED_WALL,
+)
+
 NOT_PASSABLE_WITH_FLUID = {
     EntityType.WALL,
     EntityType.TIMED_DOOR,
     EntityType.METAL_BOX,
-}
\ No newline at end of file
+}
+
+# Occupancy layers packed into GameState.state_key(), in this order.
+STATE_KEY_LAYERS = (
+    EntityType.WALL,
+    EntityType.LAVA,
+    EntityType.WATER,
+    EntityType.METAL_BOX,
+    EntityType.GOAL,
+    EntityType.CRACKED_WALL,
+    EntityType.PORTAL_ORB,
+    EntityType.TIMED_DOOR,
+)
@@ -0,0 +1,123 @@
+import functools
+import signal
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+
+from utils.constants import DEFAULT_PROFILE_INTERVAL
+
+
+# Frames from files under here are labelled by their path relative to it,
+# e.g. "core/board.py:Board.copy"; others by their file name alone.
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+# Summary groups: the package's subpackages, its top-level scripts, and
+# everything else (standard library, third-party modules).
+PACKAGE_GROUPS = ("core", "ai", "utils")
+
+
+class StackSampler:
+    """Statistical profiler sampling the main thread's Python stack.
+
+    A ``SIGPROF`` interval timer fires every ``interval`` seconds of CPU
+    time; the handler records the interrupted stack as a tuple of code
+    objects and returns. Nothing runs between samples, so the search slows
+    down by the cost of one stack walk per sample. C functions (``heapq``,
+    ``set.add``, ...) are charged to the Python function that called them.
+    """
+
+    def __init__(self, interval: float = DEFAULT_PROFILE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: Counter[tuple[CodeType, ...]] = Counter()
+        self._previous_handler = None
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[tuple(stack)] += 1
+
+    def start(self) -> None:
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def __enter__(self) -> "StackSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def total(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> list[str]:
+        """``frame;frame;... count`` lines, root first, as read by
+        flamegraph.pl, speedscope and inferno."""
+        lines = Counter()
+        for stack, count in self.samples.items():
+            lines[";".join(label(code) for code in stack)] += count
+        return [f"{stack} {count}" for stack, count in sorted(lines.items())]
+
+    def write_collapsed(self, path: Path | str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(self.collapsed()) + "\n")
+
+    def summary(self, top: int) -> str:
+        """Self samples per group and the ``top`` functions by self samples,
+        with their inclusive share of the run."""
+        total = self.total
+        if total == 0:
+            return "No samples collected"
+
+        own: Counter[str] = Counter()
+        inclusive: Counter[str] = Counter()
+        groups: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            leaf = label(stack[-1])
+            own[leaf] += count
+            groups[group(stack[-1])] += count
+            for name in {label(code) for code in stack}:
+                inclusive[name] += count
+
+        lines = [f"{total} samples every {self.interval * 1000:g} ms of CPU time", ""]
+        lines.append(f"{'group':<12} {'self':>7}")
+        for name, count in groups.most_common():
+            lines.append(f"{name:<12} {count / total:>7.1%}")
+        lines.append("")
+        lines.append(f"{'self':>7} {'total':>7}  function")
+        for name, count in own.most_common(top):
+            lines.append(f"{count / total:>7.1%} {inclusive[name] / total:>7.1%}  {name}")
+        return "\n".join(lines)
+
+
+@functools.cache
+def _relative(code: CodeType) -> Path | None:
+    try:
+        return Path(code.co_filename).resolve().relative_to(PACKAGE_ROOT)
+    except ValueError:
+        return None
+
+
+@functools.cache
+def label(code: CodeType) -> str:
+    relative = _relative(code)
+    filename = relative.as_posix() if relative is not None else Path(code.co_filename).name
+    return f"{filename}:{code.co_qualname}"
+
+
+def group(code: CodeType) -> str:
+    relative = _relative(code)
+    if relative is None:
+        return "other"
+    if len(relative.parts) > 1 and relative.parts[0] in PACKAGE_GROUPS:
+        return f"{relative.parts[0]}/"
+    return "scripts"
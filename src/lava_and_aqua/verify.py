@@ -0,0 +1,251 @@
+"""Differential checks between interchangeable engine implementations.
+
+Every check walks the reachable states of each level in ``levels/``, applies
+every available action under a reference and a candidate configuration, and
+reports any child state that differs. Run from the repository root:
+
+    uv run src/lava_and_aqua/verify.py
+"""
+
+import argparse
+from collections import deque
+from pathlib import Path
+
+from core.codec import StateCodec
+from core.engine import BOARD_BACKENDS
+from core.observer import Observer
+from core.state import GameState
+from core.zobrist import board_hash
+from utils.level_loader import LevelLoader
+
+
+def reachable_states(initial_state: GameState, max_states: int):
+    """Yield up to ``max_states`` distinct non-terminal states in BFS order."""
+    frontier = deque([initial_state])
+    seen = {hash(initial_state)}
+    produced = 0
+
+    while frontier and produced < max_states:
+        state = frontier.popleft()
+        yield state
+        produced += 1
+
+        for action in state.get_available_actions():
+            child = state.update_state(action)
+            if child.is_terminal() or hash(child) in seen:
+                continue
+            seen.add(hash(child))
+            frontier.append(child)
+
+
+def check_spread_modes(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Compare the loop and numpy fluid spreading on one level, on both
+    board backends.
+
+    Returns the number of transitions compared and how many of them differ.
+    """
+    level_data = LevelLoader.load_level(level_path)
+    previous_mode = Observer.spread_mode
+    compared = mismatches = 0
+
+    try:
+        for backend in BOARD_BACKENDS:
+            initial_state = GameState.from_level_data(level_data, backend)
+            Observer.spread_mode = "loop"
+            for state in list(reachable_states(initial_state, max_states)):
+                for action in state.get_available_actions():
+                    Observer.spread_mode = "loop"
+                    expected = state.update_state(action)
+                    Observer.spread_mode = "numpy"
+                    actual = state.update_state(action)
+
+                    compared += 1
+                    if hash(expected) != hash(actual) or expected.phase != actual.phase:
+                        mismatches += 1
+                        print(f"  {backend}: mismatch after {action} from {state}")
+    finally:
+        Observer.spread_mode = previous_mode
+
+    return compared, mismatches
+
+
+def check_fluid_front(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Compare spreading from the fluid front with a re-scan of every fluid
+    cell, on both board backends.
+
+    States are reached with front spreading, so each comparison starts from
+    the changes the boards recorded along the way.
+    """
+    level_data = LevelLoader.load_level(level_path)
+    previous = Observer.incremental_spread
+    compared = mismatches = 0
+
+    try:
+        for backend in BOARD_BACKENDS:
+            initial_state = GameState.from_level_data(level_data, backend)
+            Observer.incremental_spread = True
+            for state in list(reachable_states(initial_state, max_states)):
+                for action in state.get_available_actions():
+                    Observer.incremental_spread = False
+                    expected = state.update_state(action)
+                    Observer.incremental_spread = True
+                    actual = state.update_state(action)
+
+                    compared += 1
+                    if expected.state_key() != actual.state_key() or hash(expected) != hash(actual):
+                        mismatches += 1
+                        print(f"  {backend}: mismatch after {action} from {state}")
+    finally:
+        Observer.incremental_spread = previous
+
+    return compared, mismatches
+
+
+def check_zobrist_hash(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Compare each board's incremental Zobrist hash with a full recomputation."""
+    level_data = LevelLoader.load_level(level_path)
+    compared = mismatches = 0
+
+    for backend in BOARD_BACKENDS:
+        initial_state = GameState.from_level_data(level_data, backend)
+        for state in reachable_states(initial_state, max_states):
+            for action in state.get_available_actions():
+                child = state.update_state(action)
+                compared += 1
+                if child.board.zobrist_hash != board_hash(child.board.entities.values()):
+                    mismatches += 1
+                    print(f"  {backend}: stale hash after {action} from {state}")
+
+    return compared, mismatches
+
+
+def check_successors(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Compare GameState.successors() with get_available_actions() + update_state()."""
+    level_data = LevelLoader.load_level(level_path)
+    initial_state = GameState.from_level_data(level_data)
+    compared = mismatches = 0
+
+    for state in reachable_states(initial_state, max_states):
+        expected = [
+            (action, state.update_state(action))
+            for action in state.get_available_actions()
+        ]
+        actual = list(state.successors())
+        compared += len(expected)
+        if [action for action, _ in expected] != [action for action, _ in actual]:
+            mismatches += 1
+            print(f"  different actions from {state}")
+            continue
+        for (action, child), (_, fused_child) in zip(expected, actual):
+            if child.state_key() != fused_child.state_key():
+                mismatches += 1
+                print(f"  mismatch after {action} from {state}")
+
+    return compared, mismatches
+
+
+def check_codec(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Decode every state's key and compare the rebuilt state, its Zobrist
+    hash and its children."""
+    level_data = LevelLoader.load_level(level_path)
+    compared = mismatches = 0
+
+    for backend in BOARD_BACKENDS:
+        initial_state = GameState.from_level_data(level_data, backend)
+        codec = StateCodec(initial_state)
+        for state in reachable_states(initial_state, max_states):
+            decoded = codec.decode(codec.encode(state))
+            compared += 1
+            if (
+                decoded.state_key() != state.state_key()
+                or decoded.board.zobrist_hash != state.board.zobrist_hash
+            ):
+                mismatches += 1
+                print(f"  {backend}: {state} does not round-trip")
+                continue
+            expected = [(action, child.state_key()) for action, child in state.successors()]
+            actual = [(action, child.state_key()) for action, child in decoded.successors()]
+            if expected != actual:
+                mismatches += 1
+                print(f"  {backend}: decoded {state} has different successors")
+
+    return compared, mismatches
+
+
+def check_backends(level_path: Path, max_states: int) -> tuple[int, int]:
+    """Step every board backend through the same moves, comparing the
+    children's state keys, Zobrist hashes and phases with the dict Board's."""
+    level_data = LevelLoader.load_level(level_path)
+    backends = list(BOARD_BACKENDS)
+    initial_states = tuple(GameState.from_level_data(level_data, backend) for backend in backends)
+    frontier = deque([initial_states])
+    seen = {hash(initial_states[0])}
+    produced = compared = mismatches = 0
+
+    while frontier and produced < max_states:
+        states = frontier.popleft()
+        produced += 1
+        actions = [state.get_available_actions() for state in states]
+        if any(other != actions[0] for other in actions[1:]):
+            mismatches += 1
+            print(f"  different actions from {states[0]}")
+            continue
+
+        for action in actions[0]:
+            children = tuple(state.update_state(action) for state in states)
+            expected = children[0]
+            compared += 1
+            for backend, child in zip(backends[1:], children[1:]):
+                if (
+                    child.state_key() != expected.state_key()
+                    or child.board.zobrist_hash != expected.board.zobrist_hash
+                    or child.phase != expected.phase
+                ):
+                    mismatches += 1
+                    print(f"  {backend}: mismatch after {action} from {states[0]}")
+            if expected.is_terminal() or hash(expected) in seen:
+                continue
+            seen.add(hash(expected))
+            frontier.append(children)
+
+    return compared, mismatches
+
+
+CHECKS = {
+    "spread": check_spread_modes,
+    "front": check_fluid_front,
+    "zobrist": check_zobrist_hash,
+    "successors": check_successors,
+    "codec": check_codec,
+    "backends": check_backends,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run differential engine checks")
+    parser.add_argument("--levels", default="levels", help="directory of level files")
+    parser.add_argument(
+        "--max-states", type=int, default=5000, help="states walked per level and board backend"
+    )
+    parser.add_argument("checks", nargs="*", help=f"any of {', '.join(CHECKS)} (default: all)")
+    args = parser.parse_args()
+
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(sorted(unknown))}")
+
+    failed = 0
+    for name in args.checks or CHECKS:
+        check = CHECKS[name]
+        print(f"{name}:")
+        for level_path in sorted(Path(args.levels).glob("*.json")):
+            compared, mismatches = check(level_path, args.max_states)
+            status = "ok" if mismatches == 0 else "FAIL"
+            print(f"  {level_path.stem}: {compared} transitions, {mismatches} mismatches [{status}]")
+            failed += mismatches
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())